@@ -0,0 +1,43 @@
+import math
+import random
+
+import tkinter as tk
+
+
+class Scenery:
+    """Class Scenery draws the background (grass, sky and bushes) into one image, so the canvas
+        carries a single background item however many bushes there are.
+
+        Bushes are placed from a seeded random generator in coordinates relative to the canvas size,
+        so the same seed gives the same scenery and it is only scaled when the canvas is resized.
+    """
+    GRASS = "#90ee90"
+    SKY = "#add8e6"
+    BUSH = "#006400"
+
+    def __init__(self, seed=0, bushes=25):
+        rng = random.Random(seed)
+        # pozycje jako ułamki szerokości i wysokości, wielkość w pikselach
+        self.bushes = [(rng.random(), rng.uniform(1 / 3, 1), rng.randint(15, 35)) for _ in range(bushes)]
+
+    def render(self, width, height):
+        """Function drawing the scenery for a canvas of given size
+            Returns: PhotoImage of size width x height.
+        """
+        image = tk.PhotoImage(width=width, height=height)
+        image.put(self.GRASS, to=(0, 0, width, height))
+        image.put(self.SKY, to=(0, 0, width, max(1, height // 3)))
+
+        for fx, fy, size in self.bushes:
+            x = int(fx * width)
+            y = int(fy * height)
+            for dy in range(-size, size + 1):
+                row = y + dy
+                if row < 0 or row >= height:
+                    continue
+                half = int(math.sqrt(size * size - dy * dy))
+                left = max(0, x - half)
+                right = min(width, x + half + 1)
+                if left < right:
+                    image.put(self.BUSH, to=(left, row, right, row + 1))
+        return image
@@ -0,0 +1,383 @@
+import argparse
+import itertools
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import tkinter as tk
+
+import catalogue
+import script
+from catalogue import CATALOGUE
+from core import SimClock, Viewport
+from scheduler import PetScheduler
+from overlays import ItemPool
+from lod import DetailRenderer
+from script import Animal, StatusBar, StatusLabel, Simulator, SelectPet, SelectAct
+from sprites import SpriteStore
+
+BENCHES = ("startup", "frames", "actions", "bars")
+
+
+class FakeCanvas:
+    """Class FakeCanvas stands in for tk.Canvas in benchmarks: it keeps items and their tags and draws nothing,
+        so the Python side of rendering can be measured without a display"""
+    def __init__(self, width=800, height=400):
+        self.width = width
+        self.height = height
+        self.items = {}
+        self.ids = itertools.count(1)
+
+    def create_image(self, *coords, tags=(), **options):
+        item = next(self.ids)
+        self.items[item] = {tags} if isinstance(tags, str) else set(tags)
+        return item
+
+    create_oval = create_rectangle = create_polygon = create_line = create_text = create_image
+
+    def find_withtag(self, tag):
+        if isinstance(tag, int):
+            return (tag,) if tag in self.items else ()
+        return tuple(item for item, tags in self.items.items() if tag in tags)
+
+    def find_all(self):
+        return tuple(self.items)
+
+    def gettags(self, item):
+        return tuple(self.items.get(item, ()))
+
+    def itemconfigure(self, tag, tags=None, **options):
+        if tags is not None and tag in self.items:
+            self.items[tag] = {tags} if isinstance(tags, str) else set(tags)
+
+    def delete(self, tag):
+        for item in self.find_withtag(tag):
+            del self.items[item]
+
+    def move(self, tag, dx, dy):
+        pass
+
+    def coords(self, item, *coords):
+        pass
+
+    def tag_raise(self, tag, above=None):
+        pass
+
+    def tag_lower(self, tag, below=None):
+        pass
+
+    def tag_bind(self, tag, sequence, function):
+        pass
+
+    def bind(self, sequence, function):
+        pass
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+
+class FakeWidget:
+    """Class FakeWidget stands in for ttk widgets of status bars, every configure is counted as one Tcl call"""
+    def __init__(self, *args, calls=None, **options):
+        self.calls = calls
+
+    def pack(self, **options):
+        pass
+
+    def config(self, **options):
+        self.calls["configure"] += 1
+
+    configure = config
+
+    def __setitem__(self, key, value):
+        self.calls["configure"] += 1
+
+
+class CallCounter:
+    """Class CallCounter wraps a canvas or a widget and counts calls of its methods by name.
+        On a real Tk widget each of them is one Tcl command, the count is what a frame costs Tk."""
+    def __init__(self, target, calls):
+        self.target = target
+        self.calls = calls
+
+    def __getattr__(self, name):
+        attribute = getattr(self.target, name)
+        if not callable(attribute):
+            return attribute
+
+        calls = self.calls
+
+        def counted(*args, **kwargs):
+            calls[name] += 1
+            return attribute(*args, **kwargs)
+
+        # następne wywołania omijają __getattr__
+        setattr(self, name, counted)
+        return counted
+
+    def __setitem__(self, key, value):
+        self.calls["configure"] += 1
+        self.target[key] = value
+
+
+class NoSprites:
+    """Sprite store without images, for the fake canvas where Tk can't decode PNGs"""
+    def get(self, species, size):
+        return None
+
+
+class World:
+    """Class World is the part of Simulator that runs pets, without a window: scheduler, renderer and pets
+        on a canvas (fake or real) wrapped in a CallCounter"""
+    def __init__(self, canvas, pets, seed=0, step_ms=50, sprites=None):
+        self.calls = Counter()
+        self.canvas = CallCounter(canvas, self.calls)
+        self.clock = SimClock(step_ms)
+        self.viewport = Viewport(800, 400)
+        self.scheduler = PetScheduler(step_ms, self.viewport)
+        self.pool = ItemPool(self.canvas)
+        self.renderer = DetailRenderer(self.canvas, self.viewport)
+        self.sprites = sprites or NoSprites()
+        self.seeds = random.Random(seed)
+        self.pets = []
+        for i in range(pets):
+            self.spawn(CATALOGUE.species_list[i % len(CATALOGUE.species_list)].name)
+
+    def spawn(self, animal_type):
+        """Function adding a pet like Simulator.spawn does"""
+        x, y = self.viewport.random_target(self.seeds)
+        pet = Animal(animal_type, self.canvas, x, y, self.clock, self.viewport, self.sprites, self.pool,
+                     self.seeds.getrandbits(32))
+        pet.deferred = True
+        self.pets.append(pet)
+        self.scheduler.add(pet)
+        return pet
+
+    def frame(self, adaptive=False):
+        """Function running one frame like Simulator.frame, one simulation step per frame"""
+        started = time.perf_counter()
+        self.scheduler.advance()
+        self.scheduler.interpolate(self.scheduler.tick)
+        self.renderer.render(self.pets, self.pets[0] if self.pets else None)
+        if adaptive:
+            self.renderer.end_frame((time.perf_counter() - started) * 1000, self.pets)
+
+
+def make_canvas(root):
+    """Function returning a canvas to draw on, a real one when there is a Tk root"""
+    if root is None:
+        return FakeCanvas()
+    canvas = tk.Canvas(root, width=800, height=400)
+    canvas.pack()
+    return canvas
+
+
+def bench_startup(root, pets, args):
+    """Benchmark of startup: catalogue, sprite decoding, dialogs (real Tk only) and spawning pets"""
+    result = {}
+    start = time.perf_counter()
+    catalogue.load()
+    result["catalogue_ms"] = (time.perf_counter() - start) * 1000
+
+    sprites = None
+    if root is not None:
+        sprites = SpriteStore()
+        start = time.perf_counter()
+        for species in CATALOGUE.species_list:
+            sprites.get(species.name, species.size)
+        result["sprites_ms"] = (time.perf_counter() - start) * 1000
+
+        for name, build in (("select_pet_ms", lambda: SelectPet(root, sprites)),
+                            ("select_act_ms", lambda: SelectAct(root, "bench", script.MEAL_OPTIONS))):
+            start = time.perf_counter()
+            dialog = build()
+            root.update_idletasks()
+            result[name] = (time.perf_counter() - start) * 1000
+            dialog.dialog.destroy()
+
+    canvas = make_canvas(root)
+    start = time.perf_counter()
+    world = World(canvas, pets, args.seed, sprites=sprites)
+    took = time.perf_counter() - start
+    result["spawn_ms"] = took * 1000
+    result["spawn_us_per_pet"] = took * 1e6 / max(1, pets)
+    result["calls_per_pet"] = sum(world.calls.values()) / max(1, pets)
+    if root is not None:
+        canvas.destroy()
+    return result
+
+
+def bench_frames(root, pets, args):
+    """Benchmark of frames: simulation step, interpolation and drawing of all pets"""
+    canvas = make_canvas(root)
+    world = World(canvas, pets, args.seed)
+    for _ in range(args.warmup):
+        world.frame(args.adaptive)
+    world.calls.clear()
+
+    times = []
+    for _ in range(args.frames):
+        start = time.perf_counter()
+        world.frame(args.adaptive)
+        if root is not None:
+            root.update_idletasks()
+        times.append(time.perf_counter() - start)
+
+    total = sum(times)
+    times.sort()
+    result = {
+        "frame_ms": total * 1000 / args.frames,
+        "frame_p99_ms": times[int(0.99 * (len(times) - 1))] * 1000,
+        "us_per_pet": total * 1e6 / args.frames / max(1, pets),
+        "calls_per_frame": sum(world.calls.values()) / args.frames,
+        "calls": dict(world.calls),
+        "items": len(canvas.find_all()),
+        "level": world.renderer.level,
+    }
+    if root is not None:
+        canvas.destroy()
+    return result
+
+
+def bench_actions(root, pets, args):
+    """Benchmark of feed and play overlays: every pet is fed, then played with, each action ended right away"""
+    canvas = make_canvas(root)
+    world = World(canvas, pets, args.seed)
+    meals = [meal.name for meal in CATALOGUE.meal_list]
+    plays = [play.name for play in CATALOGUE.play_list]
+    world.calls.clear()
+
+    actions = 0
+    start = time.perf_counter()
+    for round in range(args.rounds):
+        for i, pet in enumerate(world.pets):
+            pet.feed(meals[(i + round) % len(meals)])
+            pet.after_eating()
+            pet.play(plays[(i + round) % len(plays)])
+            pet.after_eating()
+            actions += 2
+    took = time.perf_counter() - start
+
+    result = {
+        "us_per_action": took * 1e6 / max(1, actions),
+        "calls_per_action": sum(world.calls.values()) / max(1, actions),
+        "calls": dict(world.calls),
+        "pool": world.pool.stats(),
+        "items": len(canvas.find_all()),
+    }
+    if root is not None:
+        canvas.destroy()
+    return result
+
+
+def status_bars(root, calls):
+    """Function building the status bars and label of Simulator, on fake widgets when there is no Tk root
+
+        Returns: ([hunger, boredom, happiness bars], status label).
+    """
+    if root is None:
+        real = script.ttk
+        widget = lambda *args, **options: FakeWidget(calls=calls)
+        script.ttk = SimpleNamespace(Frame=widget, Label=widget, Progressbar=widget)
+    try:
+        bars = [StatusBar(root, label, color) for label, color in
+                (("Głód", "red"), ("Nuda", "blue"), ("Szczęście", "green"))]
+        label = StatusLabel(root, "")
+    finally:
+        if root is None:
+            script.ttk = real
+
+    if root is not None:
+        for bar in bars:
+            bar.progress = CallCounter(bar.progress, calls)
+            bar.label = CallCounter(bar.label, calls)
+        label.label = CallCounter(label.label, calls)
+    return bars, label
+
+
+def bench_bars(root, pets, args):
+    """Benchmark of Simulator.update_bars while a pet's stats change every frame and while they stay the same"""
+    calls = Counter()
+    (hungerbar, boredombar, happinessbar), label = status_bars(root, calls)
+    pet = SimpleNamespace(type="pies", hunger=0.0, boredom=0.0, happiness=100.0)
+    host = SimpleNamespace(pet=pet, hungerbar=hungerbar, boredombar=boredombar, happinessbar=happinessbar,
+                           status_label=label)
+    result = {}
+
+    for name, change in (("changing", 0.7), ("steady", 0)):
+        calls.clear()
+        start = time.perf_counter()
+        for i in range(args.frames):
+            pet.hunger = (i * change) % 100
+            pet.boredom = (i * change * 0.5) % 100
+            pet.happiness = 100 - pet.hunger
+            Simulator.update_bars(host)
+        took = time.perf_counter() - start
+        result[f"{name}_us"] = took * 1e6 / args.frames
+        result[f"{name}_calls"] = sum(calls.values()) / args.frames
+    return result
+
+
+def revision():
+    """Function returning the current git commit, None outside a repository"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    """Main function of the benchmark command line tool"""
+    parser = argparse.ArgumentParser(description="Headless benchmarks of the pet simulator")
+    parser.add_argument("benches", nargs="*", metavar="BENCH",
+                        help=f"benchmarks to run, all by default: {', '.join(BENCHES)}")
+    parser.add_argument("--pets", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--frames", type=int, default=200, help="measured frames (bars: update_bars calls)")
+    parser.add_argument("--warmup", type=int, default=20, help="frames run before measuring")
+    parser.add_argument("--rounds", type=int, default=3, help="actions: feed and play rounds over all pets")
+    parser.add_argument("--adaptive", action="store_true", help="let the level of detail adapt, fixed at 0 by default")
+    parser.add_argument("--tk", action="store_true", help="draw on a real Tk canvas (needs a display, e.g. xvfb-run)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = parser.parse_args(argv)
+    unknown = set(args.benches) - set(BENCHES)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    root = None
+    if args.tk:
+        try:
+            root = tk.Tk()
+        except tk.TclError as e:
+            parser.error(f"no display for --tk ({e}), run under xvfb-run")
+        root.geometry("800x600")
+
+    mode = "tk" if root else "fake"
+    meta = {"commit": revision(), "python": platform.python_version(), "mode": mode}
+    functions = {"startup": bench_startup, "frames": bench_frames, "actions": bench_actions, "bars": bench_bars}
+    for name in args.benches or BENCHES:
+        for pets in ([1] if name == "bars" else args.pets):
+            metrics = functions[name](root, pets, args)
+            if args.json:
+                print(json.dumps(dict(meta, bench=name, pets=pets, metrics=metrics), ensure_ascii=False))
+            else:
+                shown = "  ".join(f"{key} {value:.2f}" if isinstance(value, float) else f"{key} {value}"
+                                  for key, value in metrics.items() if not isinstance(value, dict))
+                print(f"{name:<8} {pets:>6} pets  {shown}")
+            sys.stdout.flush()
+
+    if root is not None:
+        root.destroy()
+
+
+if __name__ == "__main__":
+    main()
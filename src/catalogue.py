@@ -0,0 +1,126 @@
+import json
+import os
+from dataclasses import dataclass
+
+CATALOGUE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalogue.json")
+
+
+class CatalogueError(ValueError):
+    """Error raised when the catalogue file is not valid"""
+
+
+@dataclass(frozen=True, slots=True)
+class Species:
+    """Class Species is a compiled record of a pet species: movement and decay rates"""
+    name: str
+    label: str
+    index: int
+    speed: float
+    size: int
+    hunger_interval: int
+    boredom_interval: int
+
+
+@dataclass(frozen=True, slots=True)
+class Meal:
+    """Class Meal is a compiled record of a meal: hunger taken, happiness given, duration (ms) and bowl size"""
+    name: str
+    description: str
+    index: int
+    hunger: float
+    happiness: float
+    duration: int
+    bowl: int
+
+
+@dataclass(frozen=True, slots=True)
+class Play:
+    """Class Play is a compiled record of a play type: boredom taken, happiness given, duration (ms) and number of toys"""
+    name: str
+    description: str
+    index: int
+    boredom: float
+    happiness: float
+    duration: int
+    toys: int
+
+
+class Catalogue:
+    """Class Catalogue holds species, meals and plays, each as a tuple in file order and a dict by name"""
+    def __init__(self, species, meals, plays):
+        self.species_list = tuple(species)
+        self.meal_list = tuple(meals)
+        self.play_list = tuple(plays)
+        self.species = {record.name: record for record in self.species_list}
+        self.meals = {record.name: record for record in self.meal_list}
+        self.plays = {record.name: record for record in self.play_list}
+
+
+def compile_records(cls, entries, section, limits):
+    """Function validating entries of one section of the catalogue and turning them into records
+
+        Args: cls - record class, entries - list of dicts from the file, section - section name for errors,
+        limits - dict of numeric field name to (minimum, maximum).
+        Returns: list of records with index set to their position.
+    """
+    if not isinstance(entries, list) or not entries:
+        raise CatalogueError(f"{section}: expected a non-empty list")
+
+    fields = [name for name in cls.__slots__ if name != "index"]
+    types = {name: field.type for name, field in cls.__dataclass_fields__.items()}
+    records = []
+    names = set()
+    for i, entry in enumerate(entries):
+        where = f"{section}[{i}]"
+        if not isinstance(entry, dict):
+            raise CatalogueError(f"{where}: expected an object")
+        missing = set(fields) - set(entry)
+        unknown = set(entry) - set(fields)
+        if missing or unknown:
+            raise CatalogueError(f"{where}: missing {sorted(missing)}, unknown {sorted(unknown)}")
+
+        for name, (low, high) in limits.items():
+            value = entry[name]
+            kind = "an integer" if types[name] is int else "a number"
+            allowed = int if types[name] is int else (int, float)
+            if isinstance(value, bool) or not isinstance(value, allowed) or not low <= value <= high:
+                raise CatalogueError(f"{where}.{name}: expected {kind} in [{low}, {high}], got {value!r}")
+        for name in fields:
+            if name not in limits and not isinstance(entry[name], str):
+                raise CatalogueError(f"{where}.{name}: expected a string")
+
+        if entry["name"] in names:
+            raise CatalogueError(f"{where}: duplicate name {entry['name']!r}")
+        names.add(entry["name"])
+        records.append(cls(index=i, **entry))
+    return records
+
+
+def load(path=CATALOGUE_PATH):
+    """Function loading and validating the catalogue file
+
+        Returns: Catalogue.
+        Raises: CatalogueError when the file is not valid.
+    """
+    try:
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, json.JSONDecodeError) as e:
+        raise CatalogueError(f"{path}: {e}") from e
+
+    if not isinstance(data, dict):
+        raise CatalogueError(f"{path}: expected an object")
+
+    species = compile_records(Species, data.get("species"), "species", {
+        "speed": (0.1, 100), "size": (8, 512), "hunger_interval": (50, 3600000), "boredom_interval": (50, 3600000)})
+    meals = compile_records(Meal, data.get("meals"), "meals", {
+        "hunger": (0, 100), "happiness": (0, 100), "duration": (1, 600000), "bowl": (1, 100)})
+    plays = compile_records(Play, data.get("plays"), "plays", {
+        "boredom": (0, 100), "happiness": (0, 100), "duration": (1, 600000), "toys": (0, 10)})
+    for record in species:
+        if record.name != record.name.lower():
+            raise CatalogueError(f"species {record.name!r}: names must be lowercase, see SpriteStore")
+    return Catalogue(species, meals, plays)
+
+
+CATALOGUE = load()
@@ -0,0 +1,125 @@
+import heapq
+import itertools
+
+from telemetry import FIELDS
+
+THRESHOLD = 80
+
+
+class Extremes:
+    """Class Extremes keeps the smallest and largest value of a changing set of keys in two heaps.
+
+        Updating a key pushes a new entry and leaves the old one stale, stale entries are dropped when
+        they reach the top, and the heaps are rebuilt once they hold many more entries than keys,
+        so an update costs O(log n) and reading min or max is O(1) amortized.
+    """
+    def __init__(self):
+        self.values = {}
+        self.versions = {}
+        self.low = []
+        self.high = []
+        self.seq = itertools.count()
+
+    def set(self, key, value):
+        """Function setting the value of a key"""
+        version = next(self.seq)
+        self.values[key] = value
+        self.versions[key] = version
+        heapq.heappush(self.low, (value, version, key))
+        heapq.heappush(self.high, (-value, version, key))
+        if len(self.low) > 4 * len(self.values) + 64:
+            self.rebuild()
+
+    def discard(self, key):
+        """Function removing a key, its heap entries become stale"""
+        self.values.pop(key, None)
+        self.versions.pop(key, None)
+
+    def rebuild(self):
+        self.low = [(value, self.versions[key], key) for key, value in self.values.items()]
+        self.high = [(-value, version, key) for value, version, key in self.low]
+        heapq.heapify(self.low)
+        heapq.heapify(self.high)
+
+    def top(self, heap):
+        while heap and self.versions.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def min(self):
+        """Function returning (key, value) with the smallest value, None when there are no keys"""
+        entry = self.top(self.low)
+        return None if entry is None else (entry[2], entry[0])
+
+    def max(self):
+        """Function returning (key, value) with the largest value, None when there are no keys"""
+        entry = self.top(self.high)
+        return None if entry is None else (entry[2], -entry[0])
+
+
+class Census:
+    """Class Census keeps statistics of the whole population of pets, updated incrementally from
+        PetScheduler events (register on_pet as a listener), so reading them never scans the pets.
+
+        For each stat in FIELDS it keeps the sum (for the mean), the smallest and largest value, a histogram
+        splitting 0-100 into buckets equal ranges and the number of pets over THRESHOLD, as in Simulator.update_bars.
+        The worst-off pet is the one with the largest of hunger, boredom and 100 - happiness.
+        version changes whenever any of it does.
+    """
+    def __init__(self, buckets=10):
+        self.buckets = buckets
+        self.stats = {}
+        self.sums = [0.0] * len(FIELDS)
+        self.histograms = [[0] * buckets for _ in FIELDS]
+        self.over = [0] * len(FIELDS)
+        self.extremes = [Extremes() for _ in FIELDS]
+        self.worst = Extremes()
+        self.version = 0
+
+    def __len__(self):
+        return len(self.stats)
+
+    def bucket(self, value):
+        return min(int(value * self.buckets / 100), self.buckets - 1) if value > 0 else 0
+
+    def count(self, values, sign):
+        for i, value in enumerate(values):
+            self.sums[i] += sign * value
+            self.histograms[i][self.bucket(value)] += sign
+            if value > THRESHOLD:
+                self.over[i] += sign
+
+    def on_pet(self, pet, kind, name=None):
+        """Function updating statistics after an event of a pet, see PetScheduler listeners"""
+        old = self.stats.get(pet)
+        if kind == "remove":
+            if old is None:
+                return
+            self.count(old, -1)
+            del self.stats[pet]
+            for extremes in self.extremes:
+                extremes.discard(pet)
+            self.worst.discard(pet)
+            self.version += 1
+            return
+
+        values = (pet.hunger, pet.boredom, pet.happiness)
+        if values == old:
+            return
+        if old is not None:
+            self.count(old, -1)
+        self.count(values, 1)
+        self.stats[pet] = values
+        for extremes, value in zip(self.extremes, values):
+            extremes.set(pet, value)
+        self.worst.set(pet, max(values[0], values[1], 100 - values[2]))
+        self.version += 1
+
+    def mean(self, i):
+        """Function returning the mean of stat number i (see FIELDS), 0 when there are no pets"""
+        return self.sums[i] / len(self.stats) if self.stats else 0
+
+    def worst_pet(self):
+        """Function returning the worst-off pet, None when there are no pets"""
+        found = self.worst.max()
+        return found and found[0]
@@ -0,0 +1,435 @@
+import random
+import math
+import time
+
+from catalogue import CATALOGUE
+
+# tabele akcji z katalogu (catalogue.json), nazwa -> rekord
+MEALS = CATALOGUE.meals
+PLAYS = CATALOGUE.plays
+
+
+def steps_until(timer, limit, dt):
+    """Function counting steps of dt after which a timer starting at given value exceeds limit
+
+        Args: timer - current timer value, limit - value the timer has to exceed, dt - step length.
+        Returns: smallest number of steps k >= 1 for which timer + k * dt > limit.
+    """
+    k = max(1, int((limit - timer) // dt) + 1)
+    while k > 1 and timer + (k - 1) * dt > limit:
+        k -= 1
+    while timer + k * dt <= limit:
+        k += 1
+    return k
+
+
+def steps_until_zero(timer, dt):
+    """Function counting steps of dt after which a positive countdown timer reaches 0 or less
+
+        Returns: smallest number of steps k >= 1 for which timer - k * dt <= 0.
+    """
+    k = max(1, math.ceil(timer / dt))
+    while k > 1 and timer - (k - 1) * dt <= 0:
+        k -= 1
+    while timer - k * dt > 0:
+        k += 1
+    return k
+
+
+def periodic(timer, limit, dt, n):
+    """Function computing a timer that is reset to 0 every time it exceeds limit, after n steps of dt
+
+        Returns: (how many times the timer exceeded limit, timer value after n steps).
+    """
+    first = steps_until(timer, limit, dt)
+    if n < first:
+        return 0, timer + n * dt
+
+    period = steps_until(0, limit, dt)
+    return 1 + (n - first) // period, (n - first) % period * dt
+
+
+class Pet:
+    """Class Pet stores stats and movement state of a pet, independent from any GUI.
+
+        It can be stepped headless, the Tk renderer (Animal in script.py) only draws its state.
+        Movement targets come from the pet's own random generator, so a pet with a given seed
+        always makes the same choices.
+        Balance (decay intervals in ms, meal and play tables) is read from class attributes,
+        which can be overridden per pet, e.g. by balance sweeps (sweep.py).
+        Species listed in the catalogue override speed, size and decay intervals.
+    """
+    hunger_interval = 3000
+    boredom_interval = 5000
+    meals = MEALS
+    plays = PLAYS
+
+    def __init__(self, animal_type, x, y, seed=None):
+        self.type = animal_type
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.x = x
+        self.y = y
+        self.target_x = x
+        self.target_y = y
+        self.speed = 2
+        self.size = 60
+
+        species = CATALOGUE.species.get(animal_type.lower())
+        if species is not None:
+            self.speed = species.speed
+            self.size = species.size
+            self.hunger_interval = species.hunger_interval
+            self.boredom_interval = species.boredom_interval
+        self.direction = 0
+        self.move_timer = 0
+
+        # staty 0-100
+        self.hunger = 50
+        self.boredom = 50
+        self.happiness = 70
+
+        self.hungerT = 0
+        self.boredomT = 0
+
+        self.moving = False
+        self.eating = False
+        self.playing = False
+        self.actionT = 0
+
+        self.foodUsed = None
+        self.playtime = None
+
+    def step(self, dt, width, height):
+        """Function to advance the pet by dt milliseconds inside an area of given size.
+            Updates timers.
+            Increases values of hunger, every 3 seconds, and boredom, every 5 seconds.
+            Calculates and updates value of happiness, picks movement targets and moves the pet.
+
+            Args: dt - elapsed time in milliseconds, width, height - size of the area the pet lives in.
+        """
+        self.step_stats(dt)
+        self.step_motion(dt, width, height)
+
+    def step_stats(self, dt):
+        """Function to advance stats, their timers and the current action by dt milliseconds, the first half of step"""
+        self.hungerT += dt
+        self.boredomT += dt
+
+        if self.hungerT > self.hunger_interval:
+            self.hunger = min(100, self.hunger + 1)
+            self.hungerT = 0
+
+        if self.boredomT > self.boredom_interval:
+            self.boredom = min(100, self.boredom + 1)
+            self.boredomT = 0
+
+        self.happiness = max(0, 100 - (self.hunger * 0.5) - (self.boredom * 0.5))
+
+        if self.actionT > 0:
+            self.actionT -= dt
+            if self.actionT <= 0:
+                self.eating = False
+                self.playing = False
+                self.after_eating()
+
+    def step_motion(self, dt, width, height):
+        """Function to advance movement timer, pick targets and move the pet by dt milliseconds, the second half of step"""
+        self.move_timer += dt
+
+        if not self.eating and not self.playing:
+            distance_to_target = math.sqrt((self.target_x - self.x) ** 2 + (self.target_y - self.y) ** 2)
+
+            if distance_to_target < 5 or self.move_timer > 2000:
+                self.target_x = self.rng.randint(50, max(100, width - 50))
+                self.target_y = self.rng.randint(100, max(150, height - 50))
+                self.move_timer = 0
+
+            if distance_to_target > 5:
+                self.direction = math.atan2(self.target_y - self.y, self.target_x - self.x)
+                new_x = self.x + math.cos(self.direction) * self.speed
+                new_y = self.y + math.sin(self.direction) * self.speed
+
+                new_x = max(50, min(width - 50, new_x))
+                new_y = max(80, min(height - 50, new_y))
+
+                self.move(new_x, new_y)
+                self.moving = True
+            else:
+                self.moving = False
+
+    def catch_up(self, elapsed, step_ms=50):
+        """Function to advance stats by a long elapsed time in closed form, without stepping.
+
+            Gives the same hunger, boredom, happiness, timers and action state as calling step
+            with dt=step_ms for every whole step in elapsed (exactly, for an integer step_ms).
+            Position is not simulated, the pet picks a new target on the next step.
+
+            Args: elapsed - elapsed time in milliseconds, step_ms - length of one simulation step.
+            Returns: time in milliseconds left over after the whole steps.
+        """
+        n = int(elapsed // step_ms)
+        if n <= 0:
+            return elapsed
+
+        self.skip(n, step_ms)
+        self.move_timer += n * step_ms
+        return elapsed - n * step_ms
+
+    def skip(self, n, step_ms):
+        """Function to advance stats in closed form, same as calling step_stats n times with dt=step_ms
+
+            Args: n - number of steps, step_ms - length of one simulation step.
+        """
+        if n <= 0:
+            return
+
+        fired, self.hungerT = periodic(self.hungerT, self.hunger_interval, step_ms, n)
+        self.hunger = min(100, self.hunger + fired)
+
+        fired, self.boredomT = periodic(self.boredomT, self.boredom_interval, step_ms, n)
+        self.boredom = min(100, self.boredom + fired)
+
+        self.happiness = max(0, 100 - (self.hunger * 0.5) - (self.boredom * 0.5))
+
+        if self.actionT > 0:
+            k = steps_until_zero(self.actionT, step_ms)
+            if n >= k:
+                self.actionT -= k * step_ms
+                self.eating = False
+                self.playing = False
+                self.after_eating()
+            else:
+                self.actionT -= n * step_ms
+
+    def move(self, new_x, new_y):
+        """Function to move pet to new coordinates
+            Args: new_x, new_y: coordinates of target to move to.
+        """
+        self.x = new_x
+        self.y = new_y
+
+    def feed(self, meal):
+        """Function to feed the pet.
+            Updates hunger and happiness stats based on chosen meal type
+
+            Args: meal(string): chosen meal type
+            """
+        foodinfo = self.meals[meal]
+
+        self.hunger = max(0, self.hunger - foodinfo.hunger)
+        self.happiness = min(100, self.happiness + foodinfo.happiness)
+        self.eating = True
+        self.actionT = foodinfo.duration
+        self.foodUsed = meal
+
+    def play(self, playtype):
+        """Function to play with the pet.
+            Updates boredom and happiness stats based on chosen play type
+
+            Args: playtype(string) : chosen play type
+            """
+        playinfo = self.plays[playtype]
+
+        self.boredom = max(0, self.boredom - playinfo.boredom)
+        self.happiness = min(100, self.happiness + playinfo.happiness)
+        self.playing = True
+        self.actionT = playinfo.duration
+        self.playtime = playtype
+
+    def after_eating(self):
+        """Function called when an action (eating or playing) ends, renderers override it to clear visuals"""
+
+    def action_started(self, kind):
+        """Function called when an action simulated elsewhere (worker.SimWorker) starts, renderers override it
+            to show visuals
+
+            Args: kind - "feed" or "play".
+        """
+
+
+class SimClock:
+    """Class SimClock is a fixed timestep simulation clock shared by the simulator and its pets.
+
+        Real time is collected in an accumulator and spent in steps of step_ms of simulation time,
+        scaled by speed (fast-forward). A stalled frame is clamped to max_frame_ms and at most
+        max_steps are run per frame, so a slow frame never turns into a burst of steps.
+        Time cut off this way is kept in skipped, so pets can catch it up in closed form (Pet.catch_up).
+    """
+    def __init__(self, step_ms=50, speed=1, max_frame_ms=250, max_steps=2000, timer=time.monotonic):
+        self.step_ms = step_ms
+        self.speed = speed
+        self.max_frame_ms = max_frame_ms
+        self.max_steps = max_steps
+        self.timer = timer
+
+        self.paused = False
+        self.ticks = 0
+        self.accumulator = 0
+        self.skipped = 0
+        self.last = timer()
+
+    @property
+    def now(self):
+        """Simulation time in milliseconds"""
+        return self.ticks * self.step_ms
+
+    @property
+    def alpha(self):
+        """Fraction of the next step already accumulated, used to interpolate rendering"""
+        return self.accumulator / self.step_ms
+
+    def pause(self):
+        """Function to stop the simulation time"""
+        self.paused = True
+
+    def resume(self):
+        """Function to restart the simulation time, time spent paused is not simulated"""
+        self.paused = False
+        self.last = self.timer()
+
+    def set_speed(self, speed):
+        """Function to set time acceleration
+            Args: speed - how many simulated milliseconds pass in one real millisecond.
+        """
+        self.speed = speed
+
+    def advance(self):
+        """Function to collect real time elapsed since the last call.
+
+            Returns: number of fixed steps to run now.
+        """
+        current = self.timer()
+        real = (current - self.last) * 1000
+        elapsed = min(real, self.max_frame_ms)
+        self.last = current
+
+        if self.paused:
+            return 0
+
+        self.skipped += (real - elapsed) * self.speed
+        self.accumulator += elapsed * self.speed
+        steps = int(self.accumulator // self.step_ms)
+        if steps > self.max_steps:
+            self.skipped += self.accumulator - self.max_steps * self.step_ms
+            steps = self.max_steps
+            self.accumulator = 0
+        else:
+            self.accumulator -= steps * self.step_ms
+
+        self.ticks += steps
+        return steps
+
+    def take_skipped(self):
+        """Function to collect whole steps of time cut off after stalls.
+
+            Returns: skipped time in milliseconds, a multiple of step_ms.
+        """
+        steps = int(self.skipped // self.step_ms)
+        self.skipped -= steps * self.step_ms
+        self.ticks += steps
+        return steps * self.step_ms
+
+
+class FrameScheduler:
+    """Class FrameScheduler decides when the next frame is rendered, independently of the simulation step (SimClock).
+
+        Frames are planned against absolute deadlines, so time spent rendering a frame doesn't make the rate drift.
+        With nothing moving the rate drops to idle_fps, or to the moment of the next simulation event if that is
+        sooner, and to hidden_fps when the window is unmapped. wake brings the next frame forward, e.g. on user input.
+    """
+    def __init__(self, fps=20, idle_fps=5, hidden_fps=1, timer=time.monotonic):
+        self.timer = timer
+        self.idle_ms = 1000 / idle_fps
+        self.hidden_ms = 1000 / hidden_fps
+        self.set_fps(fps)
+
+        self.mapped = True
+        self.frames = 0
+        self.late = 0
+        self.next = timer()
+
+    def set_fps(self, fps):
+        """Function to set the target rendering rate while something is moving"""
+        self.fps = fps
+        self.frame_ms = 1000 / fps
+
+    def set_mapped(self, mapped):
+        """Function to tell whether the window is visible"""
+        self.mapped = mapped
+
+    def interval(self, busy, until=None):
+        """Function choosing the time between frames in milliseconds
+
+            Args: busy - whether anything is moving on screen, until - milliseconds to the next simulation event or None.
+        """
+        if not self.mapped:
+            return self.hidden_ms
+        if busy:
+            return self.frame_ms
+        if until is not None:
+            return min(self.idle_ms, max(until, self.frame_ms))
+        return self.idle_ms
+
+    def delay(self, busy, until=None):
+        """Function called at the end of a frame, planning the next one
+
+            Args: see interval.
+            Returns: delay in whole milliseconds to wait before the next frame.
+        """
+        now = self.timer()
+        self.frames += 1
+        self.next += self.interval(busy, until) / 1000
+        if self.next < now:
+            # spóźniona klatka, następna od razu, ale bez nadrabiania zaległych
+            self.late += 1
+            self.next = now
+        return round((self.next - now) * 1000)
+
+    def wake(self):
+        """Function making the next frame due now"""
+        self.next = self.timer()
+
+
+class Viewport:
+    """Class Viewport caches size of the area pets live in and the movement bounds derived from it.
+
+        The Tk side calls resize from <Configure> events, listeners (e.g. PetScheduler) are notified
+        so pets are re-clamped without polling the canvas.
+    """
+    def __init__(self, width=800, height=400):
+        self.width = 0
+        self.height = 0
+        self.listeners = []
+        self.resize(width, height)
+
+    def resize(self, width, height):
+        """Function to set a new size and notify listeners, does nothing when the size did not change"""
+        if width == self.width and height == self.height:
+            return
+
+        self.width = width
+        self.height = height
+
+        # granice ruchu, jak w Pet.step
+        self.min_x = 50
+        self.min_y = 80
+        self.max_x = width - 50
+        self.max_y = height - 50
+        self.target_max_x = max(100, width - 50)
+        self.target_max_y = max(150, height - 50)
+
+        for listener in self.listeners:
+            listener(self)
+
+    def clamp(self, x, y):
+        """Function clamping a position to movement bounds"""
+        return max(self.min_x, min(self.max_x, x)), max(self.min_y, min(self.max_y, y))
+
+    def random_target(self, rng=random):
+        """Function picking a random movement target, see Pet.step"""
+        return rng.randint(50, self.target_max_x), rng.randint(100, self.target_max_y)
+
+    def contains_target(self, x, y):
+        """Function checking if a target is inside the range random_target picks from"""
+        return 50 <= x <= self.target_max_x and 100 <= y <= self.target_max_y
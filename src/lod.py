@@ -0,0 +1,121 @@
+import time
+
+
+class DetailRenderer:
+    """Class DetailRenderer draws deferred pets (Animal.deferred) within a per-frame time budget,
+        lowering the level of detail when frames take too long.
+
+        Levels: 0 - everything drawn every frame, 1 - shadows and overlays (items tagged "detail") hidden,
+        2 - pets further than near pixels from the focused pet drawn every 2nd frame,
+        3 - all pets but the focused one drawn every 4th frame.
+        Pets outside the viewport are hidden and not drawn at all. The canvas shows the whole viewport and
+        PetScheduler keeps pets clamped inside it, so for now this only guards against pets drawn off the canvas.
+        A frame stops drawing once budget_ms is spent, the next one continues with the pets left over.
+        The level follows an average of frame times reported by end_frame: it goes up when the average
+        exceeds frame_ms and down after calm frames well under it.
+    """
+    MAX_LEVEL = 3
+    STRIDES = (1, 1, 2, 4)
+
+    def __init__(self, canvas, viewport, frame_ms=40, budget_ms=20, near=200, margin=40, timer=time.perf_counter):
+        self.canvas = canvas
+        self.viewport = viewport
+        self.frame_ms = frame_ms
+        self.budget_ms = budget_ms
+        self.near = near
+        self.margin = margin
+        self.timer = timer
+
+        self.level = 0
+        self.average = 0
+        self.calm = 0
+        self.cooldown = 0
+        self.frame = 0
+        self.cursor = 0
+        self.drawn = 0
+        self.culled = 0
+
+    def visible(self, pet):
+        """Function checking if a pet is inside the viewport, with a margin for its sprite"""
+        return (-self.margin <= pet.x <= self.viewport.width + self.margin
+                and -self.margin <= pet.y <= self.viewport.height + self.margin)
+
+    def due(self, pet, i, focus):
+        """Function checking if a pet with index i is drawn in the current frame at the current level"""
+        stride = self.STRIDES[self.level]
+        if stride == 1 or pet is focus or (self.frame + i) % stride == 0:
+            return True
+        if self.level == 2 and focus is not None:
+            return (pet.x - focus.x) ** 2 + (pet.y - focus.y) ** 2 <= self.near ** 2
+        return False
+
+    def render(self, pets, focus=None):
+        """Function drawing pets for one frame
+
+            Args: pets - list of Animal, focus - pet always drawn at full rate, or None.
+        """
+        start = self.timer()
+        self.frame += 1
+        self.drawn = 0
+        self.culled = 0
+        n = len(pets)
+        if self.cursor >= n:
+            self.cursor = 0
+
+        for k in range(n):
+            i = (self.cursor + k) % n
+            pet = pets[i]
+
+            if not self.visible(pet):
+                self.culled += 1
+                if not pet.culled:
+                    pet.culled = True
+                    self.canvas.itemconfigure(pet.tag, state="hidden")
+                continue
+            if pet.culled:
+                pet.culled = False
+                pet.draw()
+                self.canvas.itemconfigure(pet.tag, state="normal")
+
+            if (pet.x != pet.drawn_x or pet.y != pet.drawn_y) and self.due(pet, i, focus):
+                pet.draw()
+                self.drawn += 1
+                if self.drawn % 32 == 0 and (self.timer() - start) * 1000 > self.budget_ms:
+                    self.cursor = i + 1
+                    break
+        else:
+            self.cursor = 0
+
+        if self.level >= 1:
+            self.canvas.itemconfigure("detail", state="hidden")
+
+    def end_frame(self, frame_ms, pets=()):
+        """Function adapting the level of detail to the time the last frame took
+
+            Args: frame_ms - duration of the frame in milliseconds, pets - pets to restore details of
+            when the level drops back to 0.
+        """
+        self.average = 0.8 * self.average + 0.2 * frame_ms
+        if self.cooldown:
+            self.cooldown -= 1
+            return
+
+        if self.average > self.frame_ms and self.level < self.MAX_LEVEL:
+            self.set_level(self.level + 1, pets)
+        elif self.average < self.frame_ms / 2 and self.level > 0:
+            self.calm += 1
+            if self.calm >= 40:
+                self.set_level(self.level - 1, pets)
+        else:
+            self.calm = 0
+
+    def set_level(self, level, pets=()):
+        """Function switching to a level of detail, shadows and overlays are shown again at level 0"""
+        if self.level >= 1 and level == 0:
+            self.canvas.itemconfigure("detail", state="normal")
+            for pet in pets:
+                if pet.culled:
+                    self.canvas.itemconfigure(pet.tag, state="hidden")
+        self.level = level
+        self.calm = 0
+        self.cooldown = 20
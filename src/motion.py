@@ -0,0 +1,40 @@
+import math
+
+
+class Segment:
+    """Class Segment is a straight-line movement of a pet towards its target.
+
+        Position is a function of time, so it is evaluated only when needed (e.g. at render time)
+        instead of being stepped with trigonometry every tick. Times are in ticks and may be fractional.
+    """
+    __slots__ = ("x", "y", "ux", "uy", "speed", "start", "end")
+
+    def __init__(self, x, y, ux, uy, speed, start, end):
+        self.x = x
+        self.y = y
+        self.ux = ux
+        self.uy = uy
+        self.speed = speed
+        self.start = start
+        self.end = end
+
+    def position(self, t):
+        """Function computing position of the pet at time t (in ticks)"""
+        k = min(max(t - self.start, 0), self.end - self.start) * self.speed
+        return self.x + self.ux * k, self.y + self.uy * k
+
+
+def plan(x, y, target_x, target_y, speed, start):
+    """Function planning a segment from (x, y) towards a target, moving speed pixels per tick from tick start.
+
+        Like Pet.step_motion the pet stops once it is closer than 5 pixels to the target.
+        Returns: Segment.
+    """
+    dx = target_x - x
+    dy = target_y - y
+    distance = math.sqrt(dx ** 2 + dy ** 2)
+    if distance <= 5:
+        return Segment(x, y, 0, 0, speed, start, start)
+
+    steps = math.ceil((distance - 5) / speed)
+    return Segment(x, y, dx / distance, dy / distance, speed, start, start + steps)
@@ -0,0 +1,276 @@
+import argparse
+import asyncio
+import json
+import queue
+import sys
+import threading
+import time
+from collections import deque
+
+from core import MEALS, PLAYS
+
+FIELDS = ("type", "x", "y", "hunger", "boredom", "happiness", "eating", "playing")
+
+
+def pet_row(pet):
+    """Function returning the observed fields of a pet, rounded so tiny changes don't make deltas"""
+    return (pet.type, round(pet.x, 1), round(pet.y, 1), round(pet.hunger, 2), round(pet.boredom, 2),
+            round(pet.happiness, 2), pet.eating, pet.playing)
+
+
+def encode(message):
+    return (json.dumps(message, ensure_ascii=False, separators=(",", ":")) + "\n").encode()
+
+
+class Client:
+    """Class Client is the state of one connected observer: the last version it was sent and when it got a keyframe"""
+    def __init__(self, writer):
+        self.writer = writer
+        self.seq = -1
+        self.keyed = 0
+        self.wake = asyncio.Event()
+
+
+class ObserverServer:
+    """Class ObserverServer streams pet state to observers over TCP, as JSON lines, from its own thread with an asyncio loop.
+
+        The Tk thread calls publish with rows (pet_row) of pets that may have changed. Every change bumps a version
+        (seq) and each field of each pet remembers the version it last changed at. A client gets a keyframe with all
+        pets when it connects and every keyframe_s seconds, otherwise a delta with only the fields changed since the
+        version it was last sent, at most rate messages a second. A slow client simply gets a delta from an older
+        version once it catches up, so changes coalesce and nothing queues up for it; clients at the same version
+        share one encoded message.
+
+        Messages: {"type": "hello", "fields", "meals", "plays"}, {"type": "key", "seq", "t", "pets": {id: {field: value}}},
+        {"type": "delta", "seq", "t", "pets": {id: {changed field: value}}, "removed": [id]}, {"type": "error", "message"}.
+        Clients may send {"cmd": "feed" or "play", "pet": id, "name": meal or play type}, valid commands wait in
+        commands for the Tk thread.
+    """
+    def __init__(self, host="127.0.0.1", port=8765, rate=10, keyframe_s=5, history=256):
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.keyframe_s = keyframe_s
+        self.commands = queue.Queue()
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.ready = threading.Event()
+        self.error = None
+
+        self.state = {}
+        self.versions = {}
+        self.log = deque(maxlen=history)
+        self.seq = 0
+        self.floor = 0
+        self.now = 0
+        self.clients = set()
+        self.cache = {}
+
+    def start(self):
+        """Function starting the server thread, returns once it listens
+
+            Raises: OSError when the port can't be used.
+        """
+        self.thread = threading.Thread(target=lambda: asyncio.run(self.serve()), name="observer", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.error:
+            raise self.error
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.stopping = self.loop.create_future()
+        try:
+            self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        except OSError as e:
+            self.error = e
+            self.ready.set()
+            return
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.ready.set()
+        async with self.server:
+            await self.stopping
+        for client in list(self.clients):
+            client.writer.close()
+
+    def stop(self):
+        """Function closing the server and all connections"""
+        if self.loop and not self.stopping.done():
+            self.loop.call_soon_threadsafe(self.stopping.set_result, None)
+            self.thread.join(timeout=2)
+
+    def publish(self, now, rows, removed=()):
+        """Function handing rows of possibly changed pets and ids of removed pets to the server thread
+
+            Args: now - simulation time (ms), rows - dict of pet id to pet_row, removed - ids of removed pets.
+        """
+        if self.loop is not None and (rows or removed):
+            self.loop.call_soon_threadsafe(self.apply, now, rows, list(removed))
+
+    def apply(self, now, rows, removed):
+        """Function (server thread) merging published rows into the state and waking clients when something changed"""
+        seq = self.seq + 1
+        changed = set()
+        for pet, row in rows.items():
+            old = self.state.get(pet)
+            if old is None:
+                self.state[pet] = list(row)
+                self.versions[pet] = [seq] * len(FIELDS)
+                changed.add(pet)
+                continue
+            versions = self.versions[pet]
+            for i, value in enumerate(row):
+                if old[i] != value:
+                    old[i] = value
+                    versions[i] = seq
+                    changed.add(pet)
+
+        gone = [pet for pet in removed if self.state.pop(pet, None) is not None]
+        for pet in gone:
+            del self.versions[pet]
+        if not changed and not gone:
+            return
+
+        self.now = now
+        if len(self.log) == self.log.maxlen:
+            self.floor = self.log[0][0]
+        self.log.append((seq, changed, gone))
+        self.seq = seq
+        self.cache.clear()
+        for client in self.clients:
+            client.wake.set()
+
+    def keyframe(self):
+        pets = {pet: dict(zip(FIELDS, row)) for pet, row in self.state.items()}
+        return encode({"type": "key", "seq": self.seq, "t": self.now, "pets": pets})
+
+    def delta(self, since):
+        pets = {}
+        removed = []
+        for seq, changed, gone in self.log:
+            if seq <= since:
+                continue
+            for pet in changed:
+                if pet not in pets and pet in self.state:
+                    row = self.state[pet]
+                    pets[pet] = {FIELDS[i]: row[i] for i, version in enumerate(self.versions[pet]) if version > since}
+            removed.extend(gone)
+        return encode({"type": "delta", "seq": self.seq, "t": self.now, "pets": pets, "removed": removed})
+
+    def message(self, client):
+        """Function returning the next message for a client, None when it is up to date"""
+        if client.seq == self.seq:
+            return None
+        now = time.monotonic()
+        key = client.seq < self.floor or now - client.keyed >= self.keyframe_s
+        since = None if key else client.seq
+        if since not in self.cache:
+            self.cache[since] = self.keyframe() if key else self.delta(since)
+        if key:
+            client.keyed = now
+        client.seq = self.seq
+        return self.cache[since]
+
+    async def send(self, client):
+        period = 1 / self.rate
+        try:
+            while True:
+                await client.wake.wait()
+                client.wake.clear()
+                data = self.message(client)
+                if data:
+                    client.writer.write(data)
+                    await client.writer.drain()
+                await asyncio.sleep(period)
+        except ConnectionError:
+            pass
+
+    async def handle(self, reader, writer):
+        client = Client(writer)
+        writer.write(encode({"type": "hello", "fields": FIELDS, "meals": list(MEALS), "plays": list(PLAYS)}))
+        self.clients.add(client)
+        client.wake.set()
+        sender = asyncio.create_task(self.send(client))
+        try:
+            async for line in reader:
+                error = self.command(line)
+                if error:
+                    writer.write(encode({"type": "error", "message": error}))
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.clients.discard(client)
+            sender.cancel()
+            writer.close()
+
+    def command(self, line):
+        """Function validating a command line from a client and queueing it for the Tk thread
+
+            Returns: error message, None when the command was accepted.
+        """
+        try:
+            command = json.loads(line)
+        except ValueError:
+            return "not JSON"
+        if not isinstance(command, dict):
+            return "expected an object"
+        kind, pet, name = command.get("cmd"), command.get("pet"), command.get("name")
+        names = {"feed": MEALS, "play": PLAYS}.get(kind)
+        if names is None:
+            return f"unknown command {kind!r}"
+        if name not in names:
+            return f"unknown {kind} type {name!r}"
+        if pet not in self.state:
+            return f"unknown pet {pet!r}"
+        self.commands.put((kind, pet, name))
+        return None
+
+
+async def watch(host, port, commands, count):
+    """Function printing messages of an observer server, after sending given commands"""
+    # keyframes of many pets are long lines
+    reader, writer = await asyncio.open_connection(host, port, limit=2 ** 24)
+    for command in commands:
+        writer.write(encode(command))
+    await writer.drain()
+
+    pets = {}
+    n = 0
+    async for line in reader:
+        message = json.loads(line)
+        if message["type"] == "key":
+            pets = message["pets"]
+        elif message["type"] == "delta":
+            for pet, fields in message["pets"].items():
+                pets.setdefault(pet, {}).update(fields)
+            for pet in message["removed"]:
+                pets.pop(pet, None)
+        print(f"{message['type']:<6} seq {message.get('seq', '-')}  {len(line)} B  {len(pets)} pets"
+              + (f"  {message['message']}" if message["type"] == "error" else ""))
+        n += 1
+        if count and n >= count:
+            break
+    writer.close()
+
+
+def main(argv=None):
+    """Main function of a command line observer, e.g. to check a running Simulator(observer_port=8765)"""
+    parser = argparse.ArgumentParser(description="Print state updates streamed by a running pet simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--feed", nargs=2, action="append", default=[], metavar=("PET", "MEAL"))
+    parser.add_argument("--play", nargs=2, action="append", default=[], metavar=("PET", "PLAY"))
+    parser.add_argument("--count", type=int, default=0, help="stop after this many messages")
+    args = parser.parse_args(argv)
+
+    commands = ([{"cmd": "feed", "pet": pet, "name": name} for pet, name in args.feed]
+                + [{"cmd": "play", "pet": pet, "name": name} for pet, name in args.play])
+    try:
+        asyncio.run(watch(args.host, args.port, commands, args.count))
+    except (ConnectionError, KeyboardInterrupt) as e:
+        print(e, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
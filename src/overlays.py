@@ -0,0 +1,48 @@
+class ItemPool:
+    """Class ItemPool keeps hidden canvas items for reuse, so showing and hiding overlays (bowls, food, toys)
+        does not create and delete Tk items all the time.
+
+        Items are pooled by kind ("oval", "rectangle", "polygon"), a released item is hidden and waits
+        for the next acquire of the same kind, which only moves and restyles it.
+        hits counts reused items, misses counts items that had to be created.
+    """
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.free = {}
+        self.kinds = {}
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, kind, coords, tags=(), **options):
+        """Function showing an item of given kind at coords, reusing a hidden one when possible
+
+            Args: kind - "oval", "rectangle" or "polygon", coords - flat list of coordinates,
+            tags - tags of the item, options - item options like fill, outline or width.
+            Returns: id of the canvas item.
+        """
+        free = self.free.get(kind)
+        if free:
+            self.hits += 1
+            item = free.pop()
+            self.canvas.coords(item, *coords)
+            self.canvas.itemconfigure(item, state="normal", tags=tags, **options)
+            self.canvas.tag_raise(item)
+            return item
+
+        self.misses += 1
+        item = getattr(self.canvas, "create_" + kind)(*coords, tags=tags, **options)
+        self.kinds[item] = kind
+        return item
+
+    def release(self, item):
+        """Function hiding an item and returning it to the pool"""
+        self.canvas.itemconfigure(item, state="hidden", tags=())
+        self.free.setdefault(self.kinds[item], []).append(item)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def stats(self):
+        """Function returning pool counters: reused items, created items and items waiting hidden"""
+        return {"hits": self.hits, "misses": self.misses,
+                "free": sum(len(items) for items in self.free.values())}
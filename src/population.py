@@ -0,0 +1,152 @@
+import numpy as np
+
+from catalogue import CATALOGUE
+from core import Pet, MEALS, PLAYS
+
+
+class Population:
+    """Class Population stores many pets as NumPy arrays (one array per attribute) and steps them all at once.
+
+        Rules are the same as in Pet.step, applied as vectorized operations over the whole population.
+    """
+    FIELDS = ("x", "y", "target_x", "target_y", "direction", "speed", "move_timer",
+              "hunger", "boredom", "happiness", "hungerT", "boredomT", "actionT", "hunger_interval", "boredom_interval")
+    FLAGS = ("moving", "eating", "playing")
+
+    def __init__(self, capacity=1024, seed=None):
+        self.count = 0
+        self.capacity = max(1, capacity)
+        self.types = []
+        self.rng = np.random.default_rng(seed)
+
+        for name in self.FIELDS:
+            setattr(self, "_" + name, np.zeros(self.capacity))
+        for name in self.FLAGS:
+            setattr(self, "_" + name, np.zeros(self.capacity, dtype=bool))
+
+    def __len__(self):
+        return self.count
+
+    def __getattr__(self, name):
+        # widoki na zajętą część tablic, np. population.hunger
+        if name in Population.FIELDS or name in Population.FLAGS:
+            return self.__dict__["_" + name][:self.count]
+        raise AttributeError(name)
+
+    def _grow(self):
+        """Function doubling the capacity of all arrays"""
+        self.capacity *= 2
+        for name in self.FIELDS + self.FLAGS:
+            old = getattr(self, "_" + name)
+            new = np.zeros(self.capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, "_" + name, new)
+
+    def add(self, animal_type, x, y):
+        """Function adding a pet with the same starting values as Pet, speed and intervals of its species
+
+            Args: animal_type - type of the pet, x, y - starting coordinates.
+            Returns: index of the new pet.
+        """
+        if self.count == self.capacity:
+            self._grow()
+
+        i = self.count
+        self.count += 1
+        self.types.append(animal_type)
+
+        for name in self.FIELDS:
+            getattr(self, "_" + name)[i] = 0
+        for name in self.FLAGS:
+            getattr(self, "_" + name)[i] = False
+
+        self._x[i] = self._target_x[i] = x
+        self._y[i] = self._target_y[i] = y
+        self._speed[i] = 2
+        self._hunger_interval[i] = Pet.hunger_interval
+        self._boredom_interval[i] = Pet.boredom_interval
+        species = CATALOGUE.species.get(animal_type.lower())
+        if species is not None:
+            self._speed[i] = species.speed
+            self._hunger_interval[i] = species.hunger_interval
+            self._boredom_interval[i] = species.boredom_interval
+        self._hunger[i] = 50
+        self._boredom[i] = 50
+        self._happiness[i] = 70
+        return i
+
+    def feed(self, i, meal):
+        """Function to feed pet with index i, see Pet.feed"""
+        foodinfo = MEALS[meal]
+
+        self._hunger[i] = max(0, self._hunger[i] - foodinfo.hunger)
+        self._happiness[i] = min(100, self._happiness[i] + foodinfo.happiness)
+        self._eating[i] = True
+        self._actionT[i] = foodinfo.duration
+
+    def play(self, i, playtype):
+        """Function to play with pet with index i, see Pet.play"""
+        playinfo = PLAYS[playtype]
+
+        self._boredom[i] = max(0, self._boredom[i] - playinfo.boredom)
+        self._happiness[i] = min(100, self._happiness[i] + playinfo.happiness)
+        self._playing[i] = True
+        self._actionT[i] = playinfo.duration
+
+    def step(self, dt, width, height):
+        """Function to advance all pets by dt milliseconds inside an area of given size, see Pet.step
+
+            Args: dt - elapsed time in milliseconds, width, height - size of the area the pets live in.
+            Returns: indices of pets whose action (eating or playing) ended during this step.
+        """
+        n = self.count
+        x, y = self._x[:n], self._y[:n]
+        target_x, target_y = self._target_x[:n], self._target_y[:n]
+        hunger, boredom, happiness = self._hunger[:n], self._boredom[:n], self._happiness[:n]
+        hungerT, boredomT, move_timer = self._hungerT[:n], self._boredomT[:n], self._move_timer[:n]
+        actionT = self._actionT[:n]
+        eating, playing, moving = self._eating[:n], self._playing[:n], self._moving[:n]
+
+        hungerT += dt
+        boredomT += dt
+        move_timer += dt
+
+        due = hungerT > self._hunger_interval[:n]
+        hunger += due
+        np.minimum(hunger, 100, out=hunger)
+        hungerT[due] = 0
+
+        due = boredomT > self._boredom_interval[:n]
+        boredom += due
+        np.minimum(boredom, 100, out=boredom)
+        boredomT[due] = 0
+
+        np.maximum(100 - hunger * 0.5 - boredom * 0.5, 0, out=happiness)
+
+        acting = actionT > 0
+        np.subtract(actionT, dt, out=actionT, where=acting)
+        ended = acting & (actionT <= 0)
+        eating[ended] = False
+        playing[ended] = False
+
+        free = ~(eating | playing)
+        distance = np.sqrt((target_x - x) ** 2 + (target_y - y) ** 2)
+
+        retarget = free & ((distance < 5) | (move_timer > 2000))
+        k = np.count_nonzero(retarget)
+        if k:
+            target_x[retarget] = self.rng.integers(50, max(100, width - 50), k, endpoint=True)
+            target_y[retarget] = self.rng.integers(100, max(150, height - 50), k, endpoint=True)
+            move_timer[retarget] = 0
+
+        go = free & (distance > 5)
+        if go.any():
+            direction = np.arctan2(target_y[go] - y[go], target_x[go] - x[go])
+            speed = self._speed[:n][go]
+            self._direction[:n][go] = direction
+            # jak max(50, min(width - 50, x)) w Pet, np.clip dałby width - 50 gdy width < 100
+            x[go] = np.maximum(np.minimum(x[go] + np.cos(direction) * speed, width - 50), 50)
+            y[go] = np.maximum(np.minimum(y[go] + np.sin(direction) * speed, height - 50), 80)
+
+        moving[free] = go[free]
+        return np.flatnonzero(ended)
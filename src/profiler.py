@@ -0,0 +1,161 @@
+import csv
+import json
+import time
+from collections import deque
+
+PHASES = ("sim", "move", "draw", "bars", "save", "observe")
+
+
+class TclCounter:
+    """Class TclCounter stands in for the Tcl interpreter of a widget (its tk attribute) and counts commands.
+
+        Tkinter widgets send every Tcl command through self.tk.call, so putting a TclCounter there counts
+        them all without wrapping any widget method, and putting the interpreter back costs nothing later.
+    """
+    def __init__(self, tk, profiler):
+        self.tk = tk
+        self.profiler = profiler
+
+    def call(self, *args):
+        self.profiler.calls += 1
+        return self.tk.call(*args)
+
+    def __getattr__(self, name):
+        return getattr(self.tk, name)
+
+
+class FrameProfiler:
+    """Class FrameProfiler measures phases of each frame (see PHASES) while enabled.
+
+        A frame is begin(), a mark(phase) after each phase and end(). Every finished frame adds to a histogram
+        of frame times in buckets of BUCKET_MS milliseconds (the last one collects everything slower) and to
+        a trace of the last capacity frames: total and per-phase time and Tcl calls of watched widgets.
+        While disabled these calls return right away and watched widgets talk to Tcl directly.
+    """
+    BUCKET_MS = 5
+    BUCKETS = 21
+
+    def __init__(self, capacity=1000, timer=time.perf_counter):
+        self.enabled = False
+        self.capacity = capacity
+        self.timer = timer
+        self.widgets = []
+        self.calls = 0
+        self.items = None
+        self.reset()
+
+    def reset(self):
+        """Function dropping all frames measured so far"""
+        self.frames = 0
+        self.histogram = [0] * self.BUCKETS
+        self.trace = deque(maxlen=self.capacity)
+        self.started = None
+
+    def watch(self, *widgets):
+        """Function adding widgets whose Tcl calls are counted while the profiler is enabled"""
+        self.widgets.extend(widgets)
+        if self.enabled:
+            for widget in widgets:
+                widget.tk = TclCounter(widget.tk, self)
+
+    def enable(self):
+        """Function starting measurements from scratch"""
+        if self.enabled:
+            return
+        self.reset()
+        for widget in self.widgets:
+            widget.tk = TclCounter(widget.tk, self)
+        self.enabled = True
+
+    def disable(self):
+        """Function stopping measurements, measured frames are kept for export"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self.started = None
+        for widget in self.widgets:
+            widget.tk = widget.tk.tk
+
+    def toggle(self):
+        """Function switching the profiler on or off, returns True when it is on"""
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+        return self.enabled
+
+    def begin(self):
+        """Function marking the start of a frame"""
+        if not self.enabled:
+            return
+        self.started = self.last = self.timer()
+        self.first_calls = self.last_calls = self.calls
+        self.current = [0.0] * (2 * len(PHASES))
+
+    def mark(self, phase):
+        """Function ending a phase of the current frame, time and calls since the previous mark go to it"""
+        if not self.enabled or self.started is None:
+            return
+        now = self.timer()
+        i = PHASES.index(phase)
+        self.current[i] += (now - self.last) * 1000
+        self.current[len(PHASES) + i] += self.calls - self.last_calls
+        self.last = now
+        self.last_calls = self.calls
+
+    def end(self):
+        """Function finishing the current frame"""
+        if not self.enabled or self.started is None:
+            return
+        total = (self.timer() - self.started) * 1000
+        self.frames += 1
+        self.histogram[min(int(total // self.BUCKET_MS), self.BUCKETS - 1)] += 1
+        self.trace.append((self.frames, self.started, total, self.calls - self.first_calls, *self.current))
+        self.started = None
+
+    def count_items(self, canvas):
+        """Function remembering how many items the canvas has, it is one Tcl call returning all of them,
+            so it is done when the numbers are shown, not every frame"""
+        self.items = len(canvas.find_all())
+        return self.items
+
+    def percentiles(self, points=(50, 90, 99)):
+        """Function returning percentiles of frame time (ms) over the trace, nearest rank
+
+            Returns: dict of point to milliseconds, empty when no frame was measured.
+        """
+        times = sorted(row[2] for row in self.trace)
+        if not times:
+            return {}
+        return {point: times[min(len(times) - 1, int(point / 100 * len(times)))] for point in points}
+
+    def summary(self):
+        """Function returning the measurements as a dict: frames, percentiles, histogram and mean
+            time and Tcl calls of each phase per frame over the trace"""
+        n = len(self.trace) or 1
+        phases = {}
+        for i, phase in enumerate(PHASES):
+            phases[phase] = {"ms": sum(row[4 + i] for row in self.trace) / n,
+                             "calls": sum(row[4 + len(PHASES) + i] for row in self.trace) / n}
+        return {
+            "frames": self.frames,
+            "percentiles_ms": self.percentiles(),
+            "histogram": {"bucket_ms": self.BUCKET_MS, "counts": list(self.histogram)},
+            "frame_ms": sum(row[2] for row in self.trace) / n,
+            "calls_per_frame": sum(row[3] for row in self.trace) / n,
+            "phases": phases,
+            "items": self.items,
+        }
+
+    def export(self, path):
+        """Function writing the summary and the trace to a .json file, or only the trace to a .csv file"""
+        columns = (["frame", "start", "total_ms", "calls"] + [f"{phase}_ms" for phase in PHASES]
+                   + [f"{phase}_calls" for phase in PHASES])
+        if path.endswith(".csv"):
+            with open(path, "w", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow(columns)
+                writer.writerows(self.trace)
+        else:
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(dict(self.summary(), trace=[dict(zip(columns, row)) for row in self.trace]), file)
@@ -0,0 +1,148 @@
+import json
+import sys
+import time
+
+from core import Pet, Viewport
+from scheduler import PetScheduler
+
+STATE = ("x", "y", "target_x", "target_y", "hunger", "boredom", "happiness",
+         "hungerT", "boredomT", "move_timer", "actionT", "eating", "playing", "foodUsed", "playtime")
+
+
+def pet_state(pet):
+    """Function returning the saved part of a pet's state as a dict"""
+    return {name: getattr(pet, name) for name in STATE}
+
+
+class Recorder:
+    """Class Recorder writes a session to a JSON lines file, so it can be re-run headless by replay.
+
+        The first line holds step_ms and the viewport size, every next line is an event at a scheduler tick:
+        spawned pets (species, seed and state), feed and play actions, skipped time, resizes, and finally
+        the state of all pets when the session ends. Register on_pet as a PetScheduler listener.
+    """
+    def __init__(self, path, scheduler):
+        self.file = open(path, "w", encoding="utf-8")
+        self.scheduler = scheduler
+        self.index = {}
+        self.write({"step_ms": scheduler.step_ms, "width": scheduler.viewport.width,
+                    "height": scheduler.viewport.height})
+        scheduler.viewport.listeners.append(self.on_resize)
+
+    def write(self, event):
+        self.file.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def log(self, kind, **data):
+        """Function writing an event at the current tick"""
+        self.write(dict(tick=self.scheduler.tick, kind=kind, **data))
+
+    def on_pet(self, pet, kind, name=None):
+        """Function recording spawned pets and actions, see PetScheduler listeners"""
+        if kind == "add":
+            self.index[pet] = len(self.index)
+            self.log("add", type=pet.type, seed=pet.seed, state=pet_state(pet))
+        elif kind in ("feed", "play"):
+            self.log(kind, pet=self.index[pet], name=name)
+        elif kind == "remove":
+            self.log("remove", pet=self.index[pet])
+
+    def on_resize(self, viewport):
+        """Function recording a resize of the viewport"""
+        self.log("resize", width=viewport.width, height=viewport.height)
+
+    def skip(self, elapsed):
+        """Function recording time skipped in closed form (PetScheduler.skip)"""
+        self.log("skip", elapsed=elapsed)
+
+    def close(self):
+        """Function writing the final state of all pets and closing the file"""
+        for pet in self.scheduler.pets:
+            self.scheduler.sync(pet)
+        self.log("end", pets=[pet_state(pet) for pet in self.scheduler.pets])
+        self.file.close()
+
+
+def replay(path):
+    """Function re-running a recorded session headless, as fast as possible
+
+        Returns: (final state recorded, final state after replay), both lists of dicts.
+    """
+    with open(path, encoding="utf-8") as file:
+        header = json.loads(file.readline())
+        events = [json.loads(line) for line in file if line.strip()]
+
+    viewport = Viewport(header["width"], header["height"])
+    scheduler = PetScheduler(header["step_ms"], viewport)
+    pets = []
+    expected = None
+
+    for event in events:
+        if not scheduler.pets:
+            scheduler.tick = max(scheduler.tick, event["tick"])
+        scheduler.advance_to(event["tick"])
+
+        kind = event["kind"]
+        if kind == "add":
+            state = event["state"]
+            pet = Pet(event["type"], state["x"], state["y"], event["seed"])
+            for name, value in state.items():
+                setattr(pet, name, value)
+            pets.append(pet)
+            scheduler.add(pet)
+        elif kind == "feed":
+            scheduler.feed(pets[event["pet"]], event["name"])
+        elif kind == "play":
+            scheduler.play(pets[event["pet"]], event["name"])
+        elif kind == "remove":
+            scheduler.remove(pets[event["pet"]])
+        elif kind == "resize":
+            viewport.resize(event["width"], event["height"])
+        elif kind == "skip":
+            scheduler.skip(event["elapsed"])
+        elif kind == "end":
+            expected = event["pets"]
+
+    for pet in scheduler.pets:
+        scheduler.sync(pet)
+    return expected, [pet_state(pet) for pet in scheduler.pets]
+
+
+def differences(expected, actual, tolerance=1e-6):
+    """Function comparing two final states
+
+        Returns: list of (pet index, attribute, expected, actual) that differ.
+    """
+    if expected is None:
+        return [(None, "end", None, None)]
+    if len(expected) != len(actual):
+        return [(None, "count", len(expected), len(actual))]
+
+    found = []
+    for i, (want, got) in enumerate(zip(expected, actual)):
+        for name in STATE:
+            a, b = want[name], got[name]
+            if isinstance(a, float) or isinstance(b, float):
+                if abs(a - b) > tolerance:
+                    found.append((i, name, a, b))
+            elif a != b:
+                found.append((i, name, a, b))
+    return found
+
+
+def main():
+    """Main function replaying session files given on the command line, exit code 1 when any of them diverges"""
+    failed = False
+    for path in sys.argv[1:]:
+        start = time.perf_counter()
+        expected, actual = replay(path)
+        took = time.perf_counter() - start
+        found = differences(expected, actual)
+        print(f"{path}: {len(actual)} pets, {took * 1000:.1f} ms, {'OK' if not found else 'DIVERGED'}")
+        for difference in found[:10]:
+            print("   ", difference)
+        failed = failed or bool(found)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+
+from core import MEALS, PLAYS
+
+SAVE_PATH = os.path.join(os.path.expanduser("~"), ".petsim", "pets")
+
+MAGIC = b"PETS"
+VERSION = 2
+# magic, wersja, liczba zwierzaków, czas symulacji (ms), czas zapisu (unix)
+HEADER = struct.Struct("<4sHIdd")
+# gatunek, flagi, posiłek, zabawa, ziarno, x, y, target_x, target_y, hunger, boredom, happiness,
+# hungerT, boredomT, move_timer, actionT
+RECORD = struct.Struct("<HBbbI11f")
+# czas symulacji (ms), zwierzak, rodzaj, kod (posiłek, zabawa albo gatunek), ziarno, hunger, boredom, happiness,
+# hungerT, boredomT, x, y
+ENTRY = struct.Struct("<dIBBI7f")
+
+EATING = 1
+PLAYING = 2
+
+STATS = 0
+FEED = 1
+PLAY = 2
+SPAWN = 3
+KINDS = {"stats": STATS, "feed": FEED, "play": PLAY, "add": SPAWN}
+
+
+def pack_names(names):
+    """Function packing a list of names as a u16 count followed by u8-length prefixed UTF-8 strings"""
+    data = [struct.pack("<H", len(names))]
+    for name in names:
+        encoded = name.encode("utf-8")
+        data.append(struct.pack("<B", len(encoded)) + encoded)
+    return b"".join(data)
+
+
+def unpack_names(buffer, offset):
+    """Function reading names written by pack_names
+
+        Returns: (list of names, offset after them).
+    """
+    (count,) = struct.unpack_from("<H", buffer, offset)
+    offset += 2
+    names = []
+    for _ in range(count):
+        length = buffer[offset]
+        names.append(bytes(buffer[offset + 1:offset + 1 + length]).decode("utf-8"))
+        offset += 1 + length
+    return names, offset
+
+
+class Snapshot:
+    """Class Snapshot is a memory-mapped saved population, records are decoded only when accessed.
+
+        Layout: HEADER, name tables (species, meals, plays), then one fixed-size RECORD per pet.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.count, self.now, self.saved = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a pet save")
+
+        self.species, offset = unpack_names(self.buffer, HEADER.size)
+        self.meals, offset = unpack_names(self.buffer, offset)
+        self.plays, self.offset = unpack_names(self.buffer, offset)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        """Function decoding the record of pet i
+
+            Returns: dict of Pet attributes.
+        """
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        (species, flags, meal, play, seed, x, y, target_x, target_y, hunger, boredom, happiness,
+         hungerT, boredomT, move_timer, actionT) = RECORD.unpack_from(self.buffer, self.offset + i * RECORD.size)
+        return {
+            "type": self.species[species], "seed": seed, "x": x, "y": y, "target_x": target_x, "target_y": target_y,
+            "hunger": hunger, "boredom": boredom, "happiness": happiness,
+            "hungerT": hungerT, "boredomT": boredomT, "move_timer": move_timer, "actionT": actionT,
+            "eating": bool(flags & EATING), "playing": bool(flags & PLAYING),
+            "foodUsed": self.meals[meal] if meal >= 0 else None,
+            "playtime": self.plays[play] if play >= 0 else None,
+        }
+
+    def close(self):
+        """Function unmapping the file"""
+        self.buffer.close()
+
+
+def pack_snapshot(pets, now, species):
+    """Function packing pets into the snapshot format
+
+        Args: pets - list of Pet with synced state, now - simulation time in milliseconds,
+        species - list of species names, every pet type must be on it.
+        Returns: bytes.
+    """
+    meals = list(MEALS)
+    plays = list(PLAYS)
+    index = {name: i for i, name in enumerate(species)}
+    data = [HEADER.pack(MAGIC, VERSION, len(pets), now, time.time()),
+            pack_names(species), pack_names(meals), pack_names(plays)]
+
+    for pet in pets:
+        flags = (EATING if pet.eating else 0) | (PLAYING if pet.playing else 0)
+        meal = MEALS[pet.foodUsed].index if pet.foodUsed in MEALS else -1
+        play = PLAYS[pet.playtime].index if pet.playtime in PLAYS else -1
+        data.append(RECORD.pack(
+            index[pet.type], flags, meal, play, pet.seed or 0, pet.x, pet.y, pet.target_x, pet.target_y,
+            pet.hunger, pet.boredom, pet.happiness, pet.hungerT, pet.boredomT, pet.move_timer, pet.actionT))
+    return b"".join(data)
+
+
+def read_journal(path):
+    """Function reading all entries of a journal, an incomplete entry at the end (e.g. after a crash) is ignored
+
+        Returns: list of (now, pet, kind, code, seed, hunger, boredom, happiness, hungerT, boredomT, x, y).
+    """
+    if not os.path.exists(path) or os.path.getsize(path) < ENTRY.size:
+        return []
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            whole = len(buffer) - len(buffer) % ENTRY.size
+            return list(ENTRY.iter_unpack(buffer[:whole]))
+
+
+class SaveFile:
+    """Class SaveFile keeps pets on disk as a snapshot plus an append-only journal of stat changes and actions.
+
+        record only queues an entry, a writer thread appends them to the journal in batches.
+        compact packs a new snapshot (on the calling thread, where pet state is consistent) and the writer
+        thread replaces the old one and empties the journal, in order with the queued entries.
+    """
+    def __init__(self, path=SAVE_PATH, batch=256, interval=1.0, compact_every=10000):
+        self.path = path
+        self.snapshot_path = path + ".snap"
+        self.journal_path = path + ".journal"
+        self.batch = batch
+        self.interval = interval
+        self.compact_every = compact_every
+
+        self.species = []
+        self.index = {}
+        self.entries = 0
+        self.queue = queue.Queue()
+        self.thread = None
+
+    def exists(self):
+        """Function checking if there is a saved snapshot"""
+        return os.path.exists(self.snapshot_path)
+
+    def load(self):
+        """Function opening the saved snapshot and reading the journal written after it
+
+            Returns: (Snapshot, list of journal entries).
+        """
+        snapshot = Snapshot(self.snapshot_path)
+        self.species = list(snapshot.species)
+        return snapshot, read_journal(self.journal_path)
+
+    def restore(self, factory, step_ms):
+        """Function rebuilding saved pets: state from the snapshot, then stats, timers, actions and pets
+            spawned after it from the journal
+
+            Before each entry its pet is caught up (Pet.skip) from its previous entry, so actions end when they
+            did, a feed or play entry starts the action again with the duration of its catalogue record, and at
+            the end every pet is caught up to the time of the last entry. Positions are those of the snapshot
+            or of spawning, pets walk to new targets after loading anyway.
+
+            Args: factory - function (type, x, y, seed) returning a new Pet, step_ms - length of one simulation step.
+            Returns: (list of pets, simulation time in ms, seconds of real time since saving).
+        """
+        snapshot, entries = self.load()
+        pets = []
+        for i in range(len(snapshot)):
+            state = snapshot[i]
+            pet = factory(state.pop("type"), state["x"], state["y"], state.pop("seed"))
+            for name, value in state.items():
+                setattr(pet, name, value)
+            pets.append(pet)
+
+        now = snapshot.now
+        times = [now] * len(pets)
+        for now, i, kind, code, seed, hunger, boredom, happiness, hungerT, boredomT, x, y in entries:
+            if kind == SPAWN and i == len(pets):
+                pets.append(factory(snapshot.species[code], x, y, seed))
+                times.append(now)
+            elif i >= len(pets) or kind == SPAWN:
+                continue
+            pet = pets[i]
+            pet.skip(int((now - times[i]) // step_ms), step_ms)
+            times[i] = now
+            pet.hunger, pet.boredom, pet.happiness = hunger, boredom, happiness
+            pet.hungerT, pet.boredomT = hungerT, boredomT
+            if kind == FEED:
+                self.replay(pet, snapshot.meals, MEALS, code, "foodUsed")
+            elif kind == PLAY:
+                self.replay(pet, snapshot.plays, PLAYS, code, "playtime")
+
+        for pet, time_ in zip(pets, times):
+            pet.skip(int((now - time_) // step_ms), step_ms)
+
+        saved = snapshot.saved
+        if entries:
+            saved = max(saved, os.path.getmtime(self.journal_path))
+        snapshot.close()
+        self.index = {pet: i for i, pet in enumerate(pets)}
+        self.entries = len(entries)
+        return pets, now, time.time() - saved
+
+    @staticmethod
+    def replay(pet, names, records, code, attribute):
+        """Function starting again an action of a journal entry, as Pet.feed or Pet.play did but without
+            changing stats, the entry already has them
+
+            Args: names - meal or play names of the snapshot, records - MEALS or PLAYS, code - index into names,
+            attribute - "foodUsed" or "playtime".
+        """
+        name = names[code] if code < len(names) else None
+        if name not in records:
+            return
+        pet.eating = records is MEALS
+        pet.playing = records is PLAYS
+        setattr(pet, attribute, name)
+        pet.actionT = records[name].duration
+
+    def start(self):
+        """Function starting the writer thread"""
+        if self.thread is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.thread = threading.Thread(target=self._writer, daemon=True)
+            self.thread.start()
+
+    def record(self, pet, kind, now, name=None):
+        """Function queueing a journal entry for a pet event, a PetScheduler listener can call it directly
+
+            Args: pet - the pet, kind - "stats", "feed", "play", "add" or "remove",
+            now - simulation time in milliseconds, name - meal or play type.
+            Returns: True when the journal is due for compaction, or the event can only be saved by compact
+            (a removed pet, or a spawned pet of a species missing from the snapshot).
+        """
+        if kind == "remove" or kind == "add" and pet.type not in self.species:
+            return True
+
+        code = 0
+        if kind == "feed" and name in MEALS:
+            code = MEALS[name].index
+        elif kind == "play" and name in PLAYS:
+            code = PLAYS[name].index
+
+        if kind == "add":
+            self.index[pet] = len(self.index)
+            self.queue.put((now, self.index[pet], SPAWN, self.species.index(pet.type), pet.seed or 0, pet.hunger,
+                            pet.boredom, pet.happiness, pet.hungerT, pet.boredomT, pet.x, pet.y))
+        elif pet in self.index:
+            self.queue.put((now, self.index[pet], KINDS[kind], code, 0, pet.hunger, pet.boredom, pet.happiness,
+                            pet.hungerT, pet.boredomT, pet.x, pet.y))
+        else:
+            return True
+        self.entries += 1
+        return self.entries >= self.compact_every
+
+    def compact(self, pets, now, species=()):
+        """Function saving a new snapshot of pets, after which the journal starts empty
+
+            Args: pets - list of Pet with synced state, now - simulation time in milliseconds,
+            species - names always kept in the species table.
+        """
+        self.species = list(dict.fromkeys(list(species) + [pet.type for pet in pets]))
+        self.index = {pet: i for i, pet in enumerate(pets)}
+        self.queue.put(pack_snapshot(pets, now, self.species))
+        self.entries = 0
+
+    def flush(self):
+        """Function waiting until everything queued so far is written"""
+        if self.thread is not None:
+            self.queue.put("flush")
+            self.queue.join()
+
+    def close(self):
+        """Function writing what is queued and stopping the writer thread"""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def _writer(self):
+        """Writer thread: appends journal entries in batches, or after interval seconds without new ones,
+            and replaces snapshots"""
+        pending = []
+        while True:
+            try:
+                item = self.queue.get(timeout=self.interval)
+            except queue.Empty:
+                item = "idle"
+
+            if isinstance(item, tuple):
+                pending.append(ENTRY.pack(*item))
+                if len(pending) < self.batch:
+                    self.queue.task_done()
+                    continue
+
+            if pending:
+                with open(self.journal_path, "ab") as file:
+                    file.write(b"".join(pending))
+                pending = []
+
+            if isinstance(item, bytes):
+                temp = self.snapshot_path + ".tmp"
+                with open(temp, "wb") as file:
+                    file.write(item)
+                os.replace(temp, self.snapshot_path)
+                open(self.journal_path, "wb").close()
+
+            if item != "idle":
+                self.queue.task_done()
+            if item is None:
+                return
@@ -0,0 +1,259 @@
+import heapq
+import itertools
+import math
+
+from core import steps_until, steps_until_zero, Viewport
+from motion import plan
+
+
+class PetScheduler:
+    """Class PetScheduler advances many pets tick by tick, touching only pets with due events.
+
+        Stats of every pet are caught up lazily in closed form (Pet.skip) when its next event is due:
+        hunger or boredom increment, end of an action or a happiness recompute after feed/play.
+        Pets at 100 hunger and boredom have no stat events at all, stats are the same as with Pet.step.
+        Movement is planned as segments (motion.Segment) when a pet picks a target, the next retarget
+        (arrival or the 2000 ms timer) is another event. Positions are evaluated by interpolate at render time.
+        Movement bounds come from a Viewport, pets are re-clamped when it is resized.
+        Listeners are called as listener(pet, kind, name) when a pet is added ("add") or removed ("remove"),
+        when its stats change ("stats") and when it is fed or played with ("feed", "play", name of the action).
+    """
+    STATS = 0
+    MOTION = 1
+
+    def __init__(self, step_ms=50, viewport=None):
+        self.step_ms = step_ms
+        self.viewport = viewport or Viewport()
+        self.viewport.listeners.append(self.on_resize)
+        self.tick = 0
+        self.pets = []
+        self.events = []
+        self.seq = itertools.count()
+        self.due = {}
+        self.motion_due = {}
+        self.synced = {}
+        self.segments = {}
+        self.moving = {}
+        self.retargeted = {}
+        self.retarget_steps = steps_until(0, 2000, step_ms)
+        self.listeners = []
+
+    def __len__(self):
+        return len(self.pets)
+
+    def add(self, pet):
+        """Function adding a pet to the scheduler, from the current tick on"""
+        self.pets.append(pet)
+        self.synced[pet] = self.tick
+        self.retargeted[pet] = self.tick - int(pet.move_timer // self.step_ms)
+        self.motion_due[pet] = None
+        if not pet.eating and not pet.playing:
+            self._push(pet, self.tick + 1, self.MOTION)
+        self._schedule(pet)
+        self.notify(pet, "add")
+
+    def remove(self, pet):
+        """Function removing a pet from the scheduler, its stats and position are synced first"""
+        self.sync(pet)
+        self.pets.remove(pet)
+        for table in (self.due, self.motion_due, self.synced, self.segments, self.moving, self.retargeted):
+            table.pop(pet, None)
+        self.notify(pet, "remove")
+
+    def notify(self, pet, kind, name=None):
+        """Function calling listeners about an event of a pet"""
+        for listener in self.listeners:
+            listener(pet, kind, name)
+
+    def position(self, pet, t=None):
+        """Function computing position of a pet at time t in ticks (the current tick by default)"""
+        segment = self.segments.get(pet)
+        if segment is None:
+            return pet.x, pet.y
+        return segment.position(self.tick if t is None else t)
+
+    def sync(self, pet):
+        """Function bringing stats, timers and position of a pet up to the current tick, e.g. before reading them"""
+        self._sync_stats(pet)
+        pet.move_timer = (self.tick - self.retargeted[pet]) * self.step_ms
+        x, y = self.position(pet)
+        if x != pet.x or y != pet.y:
+            pet.move(x, y)
+
+    def _sync_stats(self, pet):
+        """Function bringing stats of a pet up to the current tick"""
+        n = self.tick - self.synced[pet]
+        if n:
+            stats = (pet.hunger, pet.boredom, pet.happiness)
+            pet.skip(n, self.step_ms)
+            self.synced[pet] = self.tick
+            if self.listeners and stats != (pet.hunger, pet.boredom, pet.happiness):
+                self.notify(pet, "stats")
+
+    def _next_event(self, pet):
+        """Function computing the tick of the next event changing stats of a synced pet, None if there is none"""
+        due = math.inf
+        if pet.hunger < 100:
+            due = steps_until(pet.hungerT, pet.hunger_interval, self.step_ms)
+        if pet.boredom < 100:
+            due = min(due, steps_until(pet.boredomT, pet.boredom_interval, self.step_ms))
+        if pet.actionT > 0:
+            due = min(due, steps_until_zero(pet.actionT, self.step_ms))
+        if pet.happiness != max(0, 100 - (pet.hunger * 0.5) - (pet.boredom * 0.5)):
+            due = 1
+        if due == math.inf:
+            return None
+        return self.synced[pet] + due
+
+    def _push(self, pet, due, kind):
+        """Function putting an event on the heap, older entries of the same kind become stale"""
+        if kind == self.STATS:
+            self.due[pet] = due
+        else:
+            self.motion_due[pet] = due
+        if due is not None:
+            heapq.heappush(self.events, (due, next(self.seq), kind, pet))
+
+    def _schedule(self, pet):
+        """Function scheduling the next stat event of a pet"""
+        self._push(pet, self._next_event(pet), self.STATS)
+
+    def _set_segment(self, pet, x, y):
+        """Function planning movement of a pet from (x, y) towards its target and scheduling the next retarget.
+            A target outside the movement bounds is clamped to them, so the pet stops at the edge and waits
+            for the next retarget, as Pet.step_motion keeps it there."""
+        target_x, target_y = self.viewport.clamp(pet.target_x, pet.target_y)
+        segment = plan(x, y, target_x, target_y, pet.speed, self.tick)
+        self.segments[pet] = segment
+        if segment.end > segment.start:
+            self.moving[pet] = segment
+            pet.direction = math.atan2(segment.uy, segment.ux)
+            pet.moving = True
+        else:
+            self.moving.pop(pet, None)
+            pet.moving = False
+        due = min(self.retargeted[pet] + self.retarget_steps, segment.end + 1)
+        self._push(pet, max(due, self.tick + 1), self.MOTION)
+
+    def _retarget(self, pet):
+        """Function picking a new random target for a pet, see Pet.step_motion"""
+        x, y = self.viewport.clamp(*self.position(pet))
+        pet.target_x, pet.target_y = self.viewport.random_target(pet.rng)
+        self.retargeted[pet] = self.tick
+        self._set_segment(pet, x, y)
+
+    def _stop(self, pet):
+        """Function stopping movement of a pet where it is at the current tick"""
+        self.segments.pop(pet, None)
+        self.moving.pop(pet, None)
+        self.motion_due[pet] = None
+        pet.moving = False
+
+    def _resume(self, pet):
+        """Function restarting movement of a pet after its action ended"""
+        if (self.tick - self.retargeted[pet] >= self.retarget_steps
+                or not self.viewport.contains_target(pet.target_x, pet.target_y)):
+            self._retarget(pet)
+        else:
+            self._set_segment(pet, pet.x, pet.y)
+
+    def advance(self):
+        """Function to advance all pets by one step, processing due events only"""
+        self.tick += 1
+        events = self.events
+        while events and events[0][0] <= self.tick:
+            due, _, kind, pet = heapq.heappop(events)
+            if kind == self.STATS:
+                if self.due.get(pet) != due:
+                    continue
+                acting = pet.eating or pet.playing
+                self._sync_stats(pet)
+                if acting and not pet.eating and not pet.playing:
+                    self._resume(pet)
+                self._schedule(pet)
+            elif self.motion_due.get(pet) == due:
+                self._retarget(pet)
+
+    def next_due(self):
+        """Function returning the tick of the earliest pending event, None if there is none.
+            Stale entries are not skipped, so it may be earlier than the real next event, but never later."""
+        if self.events:
+            return self.events[0][0]
+        return None
+
+    def advance_to(self, tick):
+        """Function to advance all pets up to the given tick, same as calling advance until then,
+            but ticks without due events are jumped over"""
+        while self.tick < tick:
+            due = self.next_due()
+            if due is None or due > tick:
+                self.tick = tick
+                return
+            self.tick = max(self.tick, due - 1)
+            self.advance()
+
+    def on_resize(self, viewport):
+        """Function re-clamping pets after the viewport changed size.
+            Pets outside the new bounds, or walking to a target outside them, stop and pick a new target.
+        """
+        for pet in self.pets:
+            x, y = self.position(pet)
+            if viewport.clamp(x, y) == (x, y) and viewport.contains_target(pet.target_x, pet.target_y):
+                continue
+            self.sync(pet)
+            if self.segments.get(pet) is not None:
+                self._stop(pet)
+                self._push(pet, self.tick + 1, self.MOTION)
+            pet.move(*viewport.clamp(x, y))
+
+    def interpolate(self, t):
+        """Function moving every pet with a segment in progress to its position at time t (fractional ticks),
+            called once per rendered frame"""
+        for pet, segment in list(self.moving.items()):
+            x, y = segment.position(t)
+            if x != pet.x or y != pet.y:
+                pet.move(x, y)
+            if t >= segment.end:
+                del self.moving[pet]
+                pet.moving = False
+
+    def skip(self, elapsed):
+        """Function to advance all pets by a long elapsed time in closed form, see Pet.catch_up.
+            Pets do not move meanwhile, they pick new targets on the next tick.
+
+            Args: elapsed - elapsed time in milliseconds, a multiple of step_ms.
+        """
+        n = int(elapsed // self.step_ms)
+        if n <= 0:
+            return
+        for pet in self.pets:
+            self.sync(pet)
+            self._stop(pet)
+
+        self.tick += n
+        for pet in self.pets:
+            stats = (pet.hunger, pet.boredom, pet.happiness)
+            pet.catch_up(n * self.step_ms, self.step_ms)
+            self.synced[pet] = self.tick
+            if self.listeners and stats != (pet.hunger, pet.boredom, pet.happiness):
+                self.notify(pet, "stats")
+            self.retargeted[pet] = self.tick - int(pet.move_timer // self.step_ms)
+            if not pet.eating and not pet.playing:
+                self._push(pet, self.tick + 1, self.MOTION)
+            self._schedule(pet)
+
+    def feed(self, pet, meal):
+        """Function to feed a pet at the current tick, see Pet.feed"""
+        self.sync(pet)
+        self._stop(pet)
+        pet.feed(meal)
+        self._schedule(pet)
+        self.notify(pet, "feed", meal)
+
+    def play(self, pet, playtype):
+        """Function to play with a pet at the current tick, see Pet.play"""
+        self.sync(pet)
+        self._stop(pet)
+        pet.play(playtype)
+        self._schedule(pet)
+        self.notify(pet, "play", playtype)
@@ -1,279 +1,229 @@
 import tkinter as tk
 from tkinter import ttk
+import os
+import queue
 import random
-import math
 import time
-import os
-
-
-class Animal:
-    """Class Animal stores all relevant information about object used in application"""
-    def __init__(self, animal_type, canvas, x, y):
-        self.type = animal_type
+import itertools
+import struct
+from collections import deque
+
+from catalogue import CATALOGUE
+from core import Pet, SimClock, FrameScheduler, Viewport
+from scheduler import PetScheduler
+from sprites import SPRITES
+from overlays import ItemPool
+from background import Scenery
+from lod import DetailRenderer
+from save import SaveFile, SAVE_PATH
+from telemetry import StatHistory
+from replay import Recorder
+from worker import SimWorker
+from profiler import FrameProfiler, PHASES
+from observer import ObserverServer, pet_row
+from census import Census, THRESHOLD
+
+TOY_COLORS = ("red", "blue", "green")
+TOY_SHAPES = ("oval", "rectangle", "triangle")
+MEAL_OPTIONS = {meal.name: meal.description for meal in CATALOGUE.meal_list}
+PLAY_OPTIONS = {play.name: play.description for play in CATALOGUE.play_list}
+
+
+class Animal(Pet):
+    """Class Animal is a Tk renderer of Pet, drawing the pet and its action visuals on the canvas.
+
+        All canvas items of a pet (sprite, shadow, bowl, food, toys) carry its own tag and the common
+        "pet" tag, so the whole pet moves with one canvas.move call and all pets can be moved at once.
+        Shadow and overlays also carry the "detail" tag, so a renderer can hide them all with one call.
+        A deferred pet only updates its position on move, its items follow when draw is called
+        (see lod.DetailRenderer).
+    """
+    ids = itertools.count()
+
+    def __init__(self, animal_type, canvas, x, y, clock=None, viewport=None, sprites=None, pool=None, seed=None):
+        super().__init__(animal_type, x, y, seed)
         self.canvas = canvas
-        self.x = x
-        self.y = y
-        self.target_x = x
-        self.target_y = y
-        self.speed = 2
-        self.size = 60
-        self.direction = 0
-        self.move_timer = 0
-
-        # staty 0-100
-        self.hunger = 50
-        self.boredom = 50
-        self.happiness = 70
-
-        self.hungerT = 0
-        self.boredomT = 0
+        self.pool = pool if pool is not None else ItemPool(canvas)
+        self.tag = f"pet{next(Animal.ids)}"
+        self.tags = (self.tag, "pet")
+        self.detail_tags = (self.tag, "pet", "detail")
+        self.drawn_x = x
+        self.drawn_y = y
+        self.deferred = False
+        self.culled = False
+        self.sprites = sprites or SPRITES
+        self.clock = clock
+        self.viewport = viewport
         self.last_update = time.time()
 
-        self.moving = False
-        self.eating = False
-        self.playing = False
-        self.actionT = 0
-
         self.chosenPet = None
         self.bowl = None
         self.food = None
         self.toys = []
 
-        self.foodUsed = None
-        self.playtime = None
-
         self.petImg = None
         self.load_img()
         self.visualize()
 
     def load_img(self):
-        """Function to load PNG image for the pet"""
-        try:
-            path = f"images/{self.type}.png"
-            if os.path.exists(path):
-                self.petImg = tk.PhotoImage(file=path)
-
-                width = self.petImg.width()
-                height = self.petImg.height()
-
-                if width > self.size or height > self.size:
-                    factor = max(width // self.size, height // self.size, 1)
-                    self.petImg = self.petImg.subsample(factor, factor)
-
-            else:
-                raise FileNotFoundError("nie znalezionp img")
-
-        except Exception as e:
-            print(f"Error loading PNG for {self.type}: {e}")
-            self.petImg = None
+        """Function to get the PNG image for the pet from the sprite store, decoded once for all pets"""
+        self.petImg = self.sprites.get(self.type, self.size)
 
     def visualize(self):
         """Visualize the pet from loaded image with added shadow effect"""
         self.shadow = self.canvas.create_oval(
             self.x - 25, self.y + 20, self.x + 25, self.y + 35,
-            fill="gray", outline="", stipple="gray50"
+            fill="gray", outline="", stipple="gray50", tags=self.detail_tags
         )
 
 
         self.chosenPet = self.canvas.create_image(
-        self.x, self.y, image=self.petImg, anchor=tk.CENTER)
-
-
+        self.x, self.y, image=self.petImg, anchor=tk.CENTER, tags=self.tags)
 
     def update(self):
-        """Function to control and set movement targets, update stats over elapsed time.
-            Updates timers.
-            Increases values of hunger, every 3 seconds, and boredom, every 5 seconds.
-             Calculates and updates value of happiness"""
-        current_time = time.time()
-        dt = (current_time - self.last_update) * 1000
-        self.last_update = current_time
-
-        self.hungerT += dt
-        self.boredomT += dt
-        self.move_timer += dt
-
-        if self.hungerT > 3000:
-            self.hunger = min(100, self.hunger + 1)
-            self.hungerT = 0
-
-        if self.boredomT > 5000:
-            self.boredom = min(100, self.boredom + 1)
-            self.boredomT = 0
-
-        self.happiness = max(0, 100 - (self.hunger * 0.5) - (self.boredom * 0.5))
-
-        if self.actionT > 0:
-            self.actionT -= dt
-            if self.actionT <= 0:
-                self.eating = False
-                self.playing = False
-                self.after_eating()
-
-        if not self.eating and not self.playing:
-            distance_to_target = math.sqrt((self.target_x - self.x) ** 2 + (self.target_y - self.y) ** 2)
-
-            if distance_to_target < 5 or self.move_timer > 2000:
-                canvas_width = self.canvas.winfo_width()
-                canvas_height = self.canvas.winfo_height()
-                self.target_x = random.randint(50, max(100, canvas_width - 50))
-                self.target_y = random.randint(100, max(150, canvas_height - 50))
-                self.move_timer = 0
-
-            if distance_to_target > 5:
-                self.direction = math.atan2(self.target_y - self.y, self.target_x - self.x)
-                new_x = self.x + math.cos(self.direction) * self.speed
-                new_y = self.y + math.sin(self.direction) * self.speed
-
-                canvas_width = self.canvas.winfo_width()
-                canvas_height = self.canvas.winfo_height()
-                new_x = max(50, min(canvas_width - 50, new_x))
-                new_y = max(80, min(canvas_height - 50, new_y))
-
-                self.move(new_x, new_y)
-                self.moving = True
-            else:
-                self.moving = False
+        """Function to advance the pet by one step of its clock, or by wall-clock time elapsed
+            since the last update when it has no clock, see Pet.step"""
+        if self.clock:
+            dt = self.clock.step_ms
+        else:
+            current_time = time.time()
+            dt = (current_time - self.last_update) * 1000
+            self.last_update = current_time
+
+        if self.viewport:
+            self.step(dt, self.viewport.width, self.viewport.height)
+        else:
+            self.step(dt, self.canvas.winfo_width(), self.canvas.winfo_height())
 
     def move(self, new_x, new_y):
         """Function to move pet with shadow to new coordinates
             Args: new_x, new_y: coordinates of target to move to.
 
-            Moves pet with shadow and updates self coordinates.
+            Updates self coordinates and, unless the pet is deferred, moves all its items with one call by its tag.
         """
-        dx = new_x - self.x
-        dy = new_y - self.y
+        super().move(new_x, new_y)
+        if not self.deferred:
+            self.draw()
 
-        items_to_move = [self.chosenPet, self.shadow]
+    def draw(self):
+        """Function moving canvas items of the pet to its current coordinates"""
+        dx = self.x - self.drawn_x
+        dy = self.y - self.drawn_y
 
+        if dx or dy:
+            self.canvas.move(self.tag, dx, dy)
+            self.drawn_x = self.x
+            self.drawn_y = self.y
 
-        for item in items_to_move:
-            if item:
-                self.canvas.move(item, dx, dy)
-
-        self.x = new_x
-        self.y = new_y
+    def destroy(self):
+        """Function removing all canvas items of the pet, overlays go back to the pool"""
+        self.after_eating()
+        self.canvas.delete(self.tag)
 
     def feed(self, meal):
-        """Function to feed the pet.
-            Updates hunger and happiness stats based on chosen meal type
+        """Function to feed the pet and show the bowl, see Pet.feed
 
             Args: meal(string): chosen meal type
             """
-        karma = {
-            "Przekąska": {"hunger": 15, "happiness": 5, "duration": 1500},
-            "Obiad": {"hunger": 30, "happiness": 10, "duration": 2000},
-            "Królewska uczta": {"hunger": 50, "happiness": 20, "duration": 3000}
-        }
-
-        foodinfo = karma.get(meal, karma[meal])
-
-        self.hunger = max(0, self.hunger - foodinfo["hunger"])
-        self.happiness = min(100, self.happiness + foodinfo["happiness"])
-        self.eating = True
-        self.actionT = foodinfo["duration"]
-        self.foodUsed = meal
-
+        super().feed(meal)
+        self.draw()
         self.vis_bowl()
 
     def play(self, playtype):
-        """Function to feed the pet.
-            Updates hunger and happiness stats based on chosen play type
+        """Function to play with the pet and show the toys, see Pet.play
 
             Args: playtype(string) : chosen play type
             """
-        zabawa = {
-            "Na odwal": {"boredom": 15, "happiness": 8, "duration": 2000},
-            "Z życiem": {"boredom": 25, "happiness": 15, "duration": 3000},
-            "Do upadku": {"boredom": 40, "happiness": 25, "duration": 5000}
-        }
-
-        playinfo = zabawa.get(playtype, zabawa[playtype])
-
-        self.boredom = max(0, self.boredom - playinfo["boredom"])
-        self.happiness = min(100, self.happiness + playinfo["happiness"])
-        self.playing = True
-        self.actionT = playinfo["duration"]
-        self.playtime = playtype
-
+        super().play(playtype)
+        self.draw()
         self.vis_toys()
 
+    def action_started(self, kind):
+        """Function showing the bowl or toys of an action simulated in a worker process, see Pet.action_started"""
+        self.draw()
+        if kind == "feed":
+            self.vis_bowl()
+        else:
+            self.vis_toys()
+
     def vis_bowl(self):
-        """Function visualising a bowl and food based on meal type chosen, to be sure that only one bowl is shown it firtsly clears the canvas from eventual other bowls."""
-        bowl_sizes = {"Przekąska": 15, "Obiad": 20, "Królewska uczta": 25}
-        size = bowl_sizes.get(self.foodUsed, bowl_sizes[self.foodUsed])
+        """Function visualising a bowl and food based on meal type chosen, to be sure that only one bowl is shown it firtsly hides eventual other bowls.
+            Items come from the overlay pool, so they are only moved and restyled after the first meal."""
+        size = self.meals[self.foodUsed].bowl
 
-        if self.bowl:
-            self.canvas.delete(self.bowl)
-        if self.food:
-            self.canvas.delete(self.food)
+        self.hide_bowl()
 
-        self.bowl = self.canvas.create_oval(
-            self.x - size, self.y + 40, self.x + size, self.y + 50,
-            fill="brown", outline="black", width=2
+        self.bowl = self.pool.acquire(
+            "oval", (self.x - size, self.y + 40, self.x + size, self.y + 50),
+            fill="brown", outline="black", width=2, tags=self.detail_tags
         )
 
-        self.food = self.canvas.create_oval(
-            self.x - size + 4, self.y + 42, self.x + size - 4, self.y + 48,
-            fill="yellow", outline="orange", width=1
+        self.food = self.pool.acquire(
+            "oval", (self.x - size + 4, self.y + 42, self.x + size - 4, self.y + 48),
+            fill="yellow", outline="orange", width=1, tags=self.detail_tags
         )
 
     def vis_toys(self):
-        """Function visualising toy or toys based on play type, to be sure that only one set of toys is shown it firtsly clears the canvas from eventual other toys."""
+        """Function visualising toy or toys based on play type, to be sure that only one set of toys is shown it firtsly hides eventual other toys."""
         self.after_play()
 
-        toy_counts = {"Na odwal": 1, "Z życiem": 2, "Do upadku": 3}
-        count = toy_counts.get(self.playtime, toy_counts[self.playtime])
-        colors = ["red", "blue", "green"]
-        shapes = ["oval", "rectangle", "triangle"]
+        count = self.plays[self.playtime].toys
 
         for i in range(count):
             x_offset = 40 + i * 20
             y_offset = -20 + i * 8
-            color = colors[i % len(colors)]
-            shape = shapes[i % len(shapes)]
+            color = TOY_COLORS[i % len(TOY_COLORS)]
+            shape = TOY_SHAPES[i % len(TOY_SHAPES)]
 
             if shape == "oval":
-                toy = self.canvas.create_oval(
-                    self.x + x_offset - 8, self.y + y_offset - 8,
-                    self.x + x_offset + 8, self.y + y_offset + 8,
-                    fill=color, outline="black", width=2
+                toy = self.pool.acquire(
+                    "oval", (self.x + x_offset - 8, self.y + y_offset - 8,
+                             self.x + x_offset + 8, self.y + y_offset + 8),
+                    fill=color, outline="black", width=2, tags=self.detail_tags
                 )
             elif shape == "rectangle":
-                toy = self.canvas.create_rectangle(
-                    self.x + x_offset - 6, self.y + y_offset - 6,
-                    self.x + x_offset + 6, self.y + y_offset + 6,
-                    fill=color, outline="black", width=2
+                toy = self.pool.acquire(
+                    "rectangle", (self.x + x_offset - 6, self.y + y_offset - 6,
+                                  self.x + x_offset + 6, self.y + y_offset + 6),
+                    fill=color, outline="black", width=2, tags=self.detail_tags
                 )
             else:
-                toy = self.canvas.create_polygon(
-                    self.x + x_offset, self.y + y_offset - 8,
-                    self.x + x_offset - 8, self.y + y_offset + 8,
-                    self.x + x_offset + 8, self.y + y_offset + 8,
-                    fill=color, outline="black", width=2
+                toy = self.pool.acquire(
+                    "polygon", (self.x + x_offset, self.y + y_offset - 8,
+                                self.x + x_offset - 8, self.y + y_offset + 8,
+                                self.x + x_offset + 8, self.y + y_offset + 8),
+                    fill=color, outline="black", width=2, tags=self.detail_tags
                 )
 
             self.toys.append(toy)
 
+    def hide_bowl(self):
+        """Function used to return the bowl and food to the overlay pool."""
+        if self.bowl:
+            self.pool.release(self.bowl)
+            self.bowl = None
+        if self.food:
+            self.pool.release(self.food)
+            self.food = None
+
     def after_play(self):
-        """Function used to clear the canvas from shown toys."""
+        """Function used to return shown toys to the overlay pool."""
         for toy_id in self.toys:
-            self.canvas.delete(toy_id)
+            self.pool.release(toy_id)
         self.toys = []
 
     def after_eating(self):
         """Function used to clear the canvas from any and all visuals shown from actions"""
-        if self.bowl:
-            self.canvas.delete(self.bowl)
-            self.bowl = None
-        if self.food:
-            self.canvas.delete(self.food)
-            self.food = None
+        self.hide_bowl()
         self.after_play()
 
 
 class StatusBar:
-    """Class StatusBar is a class to store info and methods realated to maintaining and updating status bars, helping visualize raw number values"""
+    """Class StatusBar is a class to store info and methods realated to maintaining and updating status bars, helping visualize raw number values.
+
+        It remembers the last shown value and style and only calls Tk when they change,
+        applied and skipped count updates that reached Tk and those that did not.
+    """
     def __init__(self, parent, label, color, max_value=100):
         self.frame = ttk.Frame(parent)
         self.label = ttk.Label(self.frame, text=f"{label}: 0")
@@ -288,14 +238,16 @@ class StatusBar:
         self.max_value = max_value
         self.label_text = label
 
+        self.shown = None
+        self.style = None
+        self.applied = 0
+        self.skipped = 0
+
     def update(self, value):
-        """Function to update the visual of status bar based on current value
+        """Function to update the visual of status bar based on current value, does nothing when neither
+            the shown (integer) value nor the colour band changed
             Args: value - current value of a stat.
         """
-        self.progress['value'] = value
-        self.label.config(text=f"{self.label_text}: {int(value)}")
-
-
         if value > 80:
             style = "red.Horizontal.TProgressbar" if self.label_text in ["Głód", "Nuda"] else "green.Horizontal.TProgressbar"
         elif value > 30:
@@ -303,12 +255,256 @@ class StatusBar:
         else:
             style = "green.Horizontal.TProgressbar" if self.label_text in ["Głód", "Nuda"] else "red.Horizontal.TProgressbar"
 
-        self.progress.config(style=style)
+        shown = int(value)
+        if shown == self.shown and style == self.style:
+            self.skipped += 1
+            return
+        self.applied += 1
+
+        if shown != self.shown:
+            self.progress['value'] = shown
+            self.label.config(text=f"{self.label_text}: {shown}")
+            self.shown = shown
+
+        if style != self.style:
+            self.progress.config(style=style)
+            self.style = style
+
+
+class StatusLabel:
+    """Class StatusLabel wraps a label showing pet status and remembers its last text and colour,
+        so setting the same message every frame costs no Tk calls"""
+    def __init__(self, parent, text, **options):
+        self.label = ttk.Label(parent, text=text, **options)
+        self.text = text
+        self.foreground = None
+        self.applied = 0
+        self.skipped = 0
+
+    def pack(self, **options):
+        """Function to pack the wrapped label"""
+        self.label.pack(**options)
+
+    def set(self, text, foreground=None):
+        """Function to show a message, the colour is kept when foreground is None
+            Args: text - message, foreground - text colour.
+        """
+        changes = {}
+        if text != self.text:
+            changes["text"] = text
+        if foreground is not None and foreground != self.foreground:
+            changes["foreground"] = foreground
+
+        if not changes:
+            self.skipped += 1
+            return
+        self.applied += 1
+        self.label.config(**changes)
+        self.text = text
+        if foreground is not None:
+            self.foreground = foreground
+
+
+class Sparkline:
+    """Class Sparkline draws recent history of stats of one pet (a StatHistory tier) as lines on a small canvas.
+
+        Only samples appended since the last refresh are drawn: older segments are shifted left with one
+        move call, each new sample adds one segment per stat and segments scrolled out are deleted.
+        Clicking the chart switches between tiers (every change, 1 s, 1 min, 1 h).
+    """
+    COLORS = ("red", "blue", "green")
+
+    def __init__(self, parent, width=200, height=60, points=100):
+        self.canvas = tk.Canvas(parent, width=width, height=height, bg="white", highlightthickness=0)
+        self.width = width
+        self.height = height
+        self.points = points
+        self.step = (width - 1) / (points - 1)
+
+        self.history = None
+        self.tier = 0
+        self.seq = 0
+        self.last = None
+        self.segments = deque()
+
+        self.title = self.canvas.create_text(3, 2, anchor=tk.NW, text=StatHistory.NAMES[0], font=("Arial", 7), fill="gray")
+        self.canvas.bind("<Button-1>", self.next_tier)
+
+    def show(self, history):
+        """Function used to show history of another pet"""
+        if history is not self.history:
+            self.history = history
+            self.redraw()
+
+    def next_tier(self, event=None):
+        """Function used to switch to the next resolution"""
+        self.tier = (self.tier + 1) % len(StatHistory.NAMES)
+        self.canvas.itemconfigure(self.title, text=StatHistory.NAMES[self.tier])
+        self.redraw()
+
+    def redraw(self):
+        """Function used to clear the chart and draw the last samples of the current tier"""
+        self.canvas.delete("spark")
+        self.segments.clear()
+        self.last = None
+        self.seq = 0
+        if self.history is not None:
+            self.seq = max(0, self.history.tiers[self.tier].ring.total - self.points)
+        self.refresh()
+
+    def y(self, value):
+        """Function mapping a stat value (0-100) to a y coordinate on the chart"""
+        return self.height - 2 - value * (self.height - 4) / 100
+
+    def refresh(self):
+        """Function used to draw samples appended since the last refresh, does nothing when there are none"""
+        if self.history is None:
+            return
+        ring = self.history.tiers[self.tier].ring
+        if ring.total == self.seq:
+            return
+        if ring.total - self.seq > self.points:
+            self.seq = ring.total
+            self.redraw()
+            return
+
+        rows = [[self.y(value) for value in values] for _, _, values in ring.since(self.seq)]
+        self.seq = ring.total
+        if self.last is not None:
+            rows.insert(0, self.last)
+            self.canvas.move("spark", -self.step * (len(rows) - 1), 0)
+
+        right = self.width - 1
+        for j in range(1, len(rows)):
+            x0 = right - (len(rows) - j) * self.step
+            self.segments.append([
+                self.canvas.create_line(x0, y0, x0 + self.step, y1, fill=color, tags="spark")
+                for y0, y1, color in zip(rows[j - 1], rows[j], self.COLORS)
+            ])
+        while len(self.segments) > self.points - 1:
+            for item in self.segments.popleft():
+                self.canvas.delete(item)
+        self.last = rows[-1]
+
+
+class PerfHud:
+    """Class PerfHud shows FrameProfiler measurements in the corner of a canvas: frame time percentiles,
+        mean time of each phase, Tcl calls per frame, canvas items, the level of detail and a histogram
+        of frame times. Items are created once, refresh only changes their text and coordinates, at most
+        every period_ms.
+    """
+    NAMES = {"sim": "sym", "move": "ruch", "draw": "rys", "bars": "paski", "save": "zapis", "observe": "obs"}
+    BAR_WIDTH = 6
+    HEIGHT = 30
+
+    def __init__(self, canvas, profiler, renderer, period_ms=500):
+        self.canvas = canvas
+        self.profiler = profiler
+        self.renderer = renderer
+        self.period_ms = period_ms
+        self.shown = False
+        self.last = 0
+
+        self.panel = canvas.create_rectangle(4, 4, 340, 96, fill="black", stipple="gray50", outline="",
+                                             state="hidden", tags="hud")
+        self.text = canvas.create_text(10, 8, anchor=tk.NW, fill="white", font=("Courier", 8),
+                                       state="hidden", tags="hud")
+        self.bars = [canvas.create_rectangle(0, 0, 0, 0, fill="orange", outline="", state="hidden", tags="hud")
+                     for _ in range(profiler.BUCKETS)]
+
+    def toggle(self):
+        """Function showing or hiding the HUD, the profiler runs only while it is shown"""
+        self.shown = self.profiler.toggle()
+        self.canvas.itemconfigure("hud", state="normal" if self.shown else "hidden")
+        if self.shown:
+            self.last = 0
+            self.refresh()
+
+    def refresh(self):
+        """Function updating the HUD with the latest measurements, does nothing when it was done recently"""
+        now = time.perf_counter() * 1000
+        if not self.shown or now - self.last < self.period_ms:
+            return
+        self.last = now
+
+        summary = self.profiler.summary()
+        p = summary["percentiles_ms"]
+        items = self.profiler.count_items(self.canvas)
+        lines = [
+            f"klatka p50 {p.get(50, 0):5.1f}  p90 {p.get(90, 0):5.1f}  p99 {p.get(99, 0):5.1f} ms",
+            "  ".join(f"{self.NAMES[phase]} {summary['phases'][phase]['ms']:.1f}" for phase in PHASES),
+            f"Tcl {summary['calls_per_frame']:.0f}/klatkę  elementy {items}  LOD {self.renderer.level}",
+        ]
+        self.canvas.itemconfigure(self.text, text="\n".join(lines))
+
+        counts = summary["histogram"]["counts"]
+        peak = max(counts) or 1
+        bottom = 92
+        for i, (bar, count) in enumerate(zip(self.bars, counts)):
+            x = 10 + i * (self.BAR_WIDTH + 2)
+            self.canvas.coords(bar, x, bottom - self.HEIGHT * count / peak, x + self.BAR_WIDTH, bottom)
+        self.canvas.tag_raise("hud")
+
+
+class CensusPanel:
+    """Class CensusPanel shows statistics of all pets (a Census): number of pets, mean, min and max of each stat,
+        pets over the threshold and a histogram per stat. It only changes widgets when the census changed,
+        and then touches a fixed number of them, however many pets there are.
+    """
+    NAMES = ("Głód", "Nuda", "Szczęście")
+    COLORS = ("red", "blue", "green")
+    HEIGHT = 40
+
+    def __init__(self, parent, census, on_worst):
+        self.census = census
+        self.version = None
+        self.frame = ttk.Frame(parent)
+
+        self.title = StatusLabel(self.frame, "Stado: 0", font=("Arial", 9, "bold"))
+        self.title.pack(anchor=tk.W)
+        self.lines = [StatusLabel(self.frame, "", font=("Courier", 8)) for _ in self.NAMES]
+        for line in self.lines:
+            line.pack(anchor=tk.W)
+
+        width = len(self.NAMES) * (census.buckets * 4 + 8)
+        self.canvas = tk.Canvas(self.frame, width=width, height=self.HEIGHT, bg="white", highlightthickness=0)
+        self.canvas.pack(anchor=tk.W, pady=2)
+        self.bars = []
+        for i, color in enumerate(self.COLORS):
+            for j in range(census.buckets):
+                x = i * (census.buckets * 4 + 8) + j * 4
+                self.bars.append(self.canvas.create_rectangle(x, self.HEIGHT, x + 3, self.HEIGHT, fill=color, outline=""))
+        self.heights = [0] * len(self.bars)
+
+        ttk.Button(self.frame, text="Najgorzej", command=on_worst).pack(anchor=tk.W)
+
+    def refresh(self):
+        """Function used to show the current statistics, does nothing when they did not change"""
+        census = self.census
+        if census.version == self.version:
+            return
+        self.version = census.version
+
+        self.title.set(f"Stado: {len(census)}")
+        for i, (name, line) in enumerate(zip(self.NAMES, self.lines)):
+            low, high = census.extremes[i].min(), census.extremes[i].max()
+            line.set(f"{name:<9} śr {census.mean(i):5.1f}  min {low[1] if low else 0:3.0f}  "
+                     f"max {high[1] if high else 0:3.0f}  >{THRESHOLD}: {census.over[i]}")
+
+        for i, histogram in enumerate(census.histograms):
+            peak = max(histogram) or 1
+            for j, count in enumerate(histogram):
+                k = i * census.buckets + j
+                height = round((self.HEIGHT - 2) * count / peak)
+                if height != self.heights[k]:
+                    self.heights[k] = height
+                    x = i * (census.buckets * 4 + 8) + j * 4
+                    self.canvas.coords(self.bars[k], x, self.HEIGHT - height, x + 3, self.HEIGHT)
 
 
 class SelectPet:
     """Class SelectPet is a class used to control showing of window used to select which pet to take care of"""
-    def __init__(self, parent):
+    def __init__(self, parent, sprites=SPRITES):
         self.result = None
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("Choose Your Pet")
@@ -323,42 +519,31 @@ class SelectPet:
         pet_frame = ttk.Frame(self.dialog)
         pet_frame.pack(pady=20)
 
-        pets = ["Pies", "królik", "Kot", "Ptak"]
-
         self.preview_images = {}
-        for pet in pets:
-            try:
-                image_path = f"images/{pet.lower()}.png"
-                if os.path.exists(image_path):
-                    photo = tk.PhotoImage(file=image_path)
-                    if photo.width() > 80 or photo.height() > 80:
-                        factor = max(photo.width() // 80, photo.height() // 80, 1)
-                        photo = photo.subsample(factor, factor)
-                    self.preview_images[pet.lower()] = photo
-            except Exception as e:
-                print(f"nie załadowano {pet}: {e}")
-
-        i = 0
-        for pet in pets:
+        for species in CATALOGUE.species_list:
+            photo = sprites.get(species.name, 80)
+            if photo is not None:
+                self.preview_images[species.name] = photo
+
+        for i, species in enumerate(CATALOGUE.species_list):
             frame = ttk.Frame(pet_frame)
-            frame.grid(row=0, column=i, padx=15, pady=10)
+            frame.grid(row=i // 4, column=i % 4, padx=15, pady=10)
 
             preview_canvas = tk.Canvas(frame, width=100, height=100, bg="lightgray", relief=tk.RAISED, bd=2)
             preview_canvas.pack()
 
-            if pet.lower() in self.preview_images:
-                preview_canvas.create_image(50, 50, image=self.preview_images[pet.lower()], anchor=tk.CENTER)
+            if species.name in self.preview_images:
+                preview_canvas.create_image(50, 50, image=self.preview_images[species.name], anchor=tk.CENTER)
             else:
-                preview_canvas.create_text(50, 50, text=pet, font=("Arial", 24), anchor=tk.CENTER)
+                preview_canvas.create_text(50, 50, text=species.label, font=("Arial", 24), anchor=tk.CENTER)
 
-            preview_canvas.bind("<Button-1>", lambda l, n=pet.lower(): self.select_pet(n))
+            preview_canvas.bind("<Button-1>", lambda l, n=species.name: self.select_pet(n))
 
-            name_label = ttk.Label(frame, text=pet, font=("Arial", 10, "bold"))
+            name_label = ttk.Label(frame, text=species.label, font=("Arial", 10, "bold"))
             name_label.pack(pady=(5, 0))
 
             click_label = ttk.Label(frame, text="Click to select", font=("Arial", 8), foreground="gray")
             click_label.pack()
-            i += 1
 
 
         self.dialog.protocol("WM_DELETE_WINDOW", self.on_close)
@@ -421,8 +606,17 @@ class SelectAct:
 
 
 class Simulator:
-    """Class Simulator controls how the main window is viewed"""
-    def __init__(self):
+    """Class Simulator controls how the main window is viewed.
+
+        With worker=True pets are simulated in a separate process (worker.SimWorker) and the Tk thread only
+        renders the latest snapshot, actions and new pets are sent to the worker.
+        With observer_port set, pet state is streamed to local observers (observer.ObserverServer),
+        which may also feed and play with pets.
+    """
+    def __init__(self, fps=20, step_ms=50, seed=0, frame_budget_ms=40, save_path=SAVE_PATH, record_path=None,
+                 worker=False, observer_port=None):
+        if worker and record_path:
+            raise ValueError("recording needs the simulation in the Tk process, use worker=False")
 
         self.root = tk.Tk()
         self.root.title("Pet Simulator")
@@ -439,11 +633,63 @@ class Simulator:
         self.boredombar = None
         self.hungerbar = None
         self.pet_info_label = None
+        self.chart = None
         self.playbutton = None
         self.feedbutton = None
         self.pet = None
+        self.pets = []
+        self.pets_by_tag = {}
+        self.clock = SimClock(step_ms)
+        self.stall_ms = self.clock.max_frame_ms
+        self.frames = FrameScheduler(fps)
+        self.frame_job = None
+        self.seeds = random.Random(seed)
+        self.scenery = Scenery(seed)
+        self.background_image = None
+        self.background_item = None
+        self.background_job = None
+        self.viewport = Viewport()
+        self.scheduler = PetScheduler(self.clock.step_ms, self.viewport)
+        self.sprites = SPRITES
+        self.sprites.warm(self.root, [(species.name, species.size) for species in CATALOGUE.species_list])
+        self.census = Census()
         self.ui()
-        self.select_pet()
+        self.overlays = ItemPool(self.canvas)
+        self.renderer = DetailRenderer(self.canvas, self.viewport, frame_budget_ms, frame_budget_ms / 2)
+        self.profiler = FrameProfiler()
+        self.profiler.watch(self.canvas, self.chart.canvas, self.status_label.label,
+                            *(widget for bar in (self.hungerbar, self.boredombar, self.happinessbar)
+                              for widget in (bar.progress, bar.label)))
+        self.hud = PerfHud(self.canvas, self.profiler, self.renderer)
+        self.worker = SimWorker(step_ms=step_ms, width=self.viewport.width, height=self.viewport.height) if worker else None
+        self.save = SaveFile(save_path) if save_path else None
+        self.compact_due = False
+        self.histories = {}
+        self.scheduler.listeners.append(self.on_telemetry)
+        self.scheduler.listeners.append(self.census.on_pet)
+        self.recorder = Recorder(record_path, self.scheduler) if record_path else None
+        if self.recorder:
+            self.scheduler.listeners.append(self.recorder.on_pet)
+        self.observer = None
+        self.observed = set()
+        self.observed_moving = set()
+        self.observed_removed = []
+        self.observed_at = 0
+        if observer_port is not None:
+            self.observer = ObserverServer(port=observer_port)
+            self.observer.start()
+            self.scheduler.listeners.append(self.on_observed)
+
+        if self.save and self.save.exists():
+            self.load()
+        if not self.pet:
+            self.select_pet()
+
+        if self.save:
+            self.save.start()
+            self.save_all()
+            self.scheduler.listeners.append(self.on_pet_event)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         if self.pet:
             self.start()
@@ -460,7 +706,10 @@ class Simulator:
         self.feedbutton.pack(side=tk.LEFT, padx=(0, 10))
 
         self.playbutton = ttk.Button(control_frame, text="Pobaw się", command=self.show_fun)
-        self.playbutton.pack(side=tk.LEFT)
+        self.playbutton.pack(side=tk.LEFT, padx=(0, 10))
+
+        self.addbutton = ttk.Button(control_frame, text="Dodaj zwierzaka", command=self.add_pet)
+        self.addbutton.pack(side=tk.LEFT)
 
         self.pet_info_label = ttk.Label(control_frame, text="Zwierzak", font=("Arial", 12, "bold"))
         self.pet_info_label.pack(side=tk.RIGHT)
@@ -468,6 +717,12 @@ class Simulator:
         status_frame = ttk.Frame(main_frame)
         status_frame.pack(fill=tk.X, pady=(0, 10))
 
+        self.chart = Sparkline(status_frame)
+        self.chart.canvas.pack(side=tk.RIGHT)
+
+        self.census_panel = CensusPanel(status_frame, self.census, self.show_worst)
+        self.census_panel.frame.pack(side=tk.RIGHT, padx=(0, 10))
+
         self.hungerbar = StatusBar(status_frame, "Głód", "red")
         self.hungerbar.frame.pack(fill=tk.X, pady=2)
 
@@ -479,74 +734,310 @@ class Simulator:
 
         self.canvas = tk.Canvas(main_frame, bg="lightgreen", relief=tk.SUNKEN, borderwidth=2)
         self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.canvas.bind("<Configure>", self.on_configure)
+        self.canvas.tag_bind("pet", "<Button-1>", self.on_pet_click)
 
-        self.status_label = ttk.Label(main_frame, text="Zaopiekuj się zwierzakiem!", font=("Arial", 10))
+        self.status_label = StatusLabel(main_frame, text="Zaopiekuj się zwierzakiem!", font=("Arial", 10))
         self.status_label.pack(pady=(10, 0))
 
-        self.canvas.after(100, self.background)
+        self.root.bind("<space>", self.toggle_pause)
+        for key, speed in (("1", 1), ("2", 10), ("3", 100), ("4", 1000)):
+            self.root.bind(key, lambda e, s=speed: self.fast_forward(s))
+        self.root.bind("<Tab>", self.next_pet)
+        self.root.bind("<Map>", self.on_map)
+        self.root.bind("<Unmap>", self.on_map)
+        self.root.bind_all("<KeyPress>", self.wake, add="+")
+        self.root.bind_all("<ButtonPress>", self.wake, add="+")
+        self.root.bind("<plus>", lambda e: self.spawn_many(10))
+        self.root.bind("<F3>", lambda e: self.hud.toggle())
+        self.root.bind("<F4>", self.export_profile)
+
+    def on_configure(self, event):
+        """Function used to pass the new canvas size to the viewport when the canvas is resized,
+            the background is redrawn once resizing settles"""
+        self.viewport.resize(event.width, event.height)
+        if self.worker:
+            self.worker.send("resize", event.width, event.height)
+        if self.background_job is not None:
+            self.canvas.after_cancel(self.background_job)
+        self.background_job = self.canvas.after(150, self.background)
 
     def background(self):
-        """Function used to control the way a background is displayed"""
-        if self.canvas.winfo_width() > 1:
-
-            self.canvas.create_rectangle(0, 0, self.canvas.winfo_width(), self.canvas.winfo_height() // 3, fill="lightblue", outline="", tags="background")
-
-            for _ in range(25):
-                x = random.randint(0, self.canvas.winfo_width())
-                y = random.randint(self.canvas.winfo_height() // 3, self.canvas.winfo_height())
-                size = random.randint(15, 35)
-                self.canvas.create_oval(x - size, y - size, x + size, y + size, fill="darkgreen", outline="", tags="background")
+        """Function used to control the way a background is displayed, as one cached image under all pets"""
+        self.background_job = None
+        width = self.viewport.width
+        height = self.viewport.height
+        if width > 1:
+            self.background_image = self.scenery.render(width, height)
+
+            if self.background_item is None:
+                self.background_item = self.canvas.create_image(0, 0, image=self.background_image, anchor=tk.NW, tags="background")
+                self.canvas.tag_lower(self.background_item)
+            else:
+                self.canvas.itemconfigure(self.background_item, image=self.background_image)
 
     def select_pet(self):
-        """Function used to show the pet selection window"""
-        dialog = SelectPet(self.root)
+        """Function used to show the pet selection window, the first pet starts in the middle of the canvas"""
+        dialog = SelectPet(self.root, self.sprites)
         self.root.wait_window(dialog.dialog)
 
         if dialog.result:
-            canvas_width = 800
-            canvas_height = 400
-            self.pet = Animal(dialog.result, self.canvas, canvas_width // 2, canvas_height // 2)
-            self.pet_info_label.config(text=f"Futrzak: {dialog.result.capitalize()}")
-
+            x, y = self.viewport.clamp(self.viewport.width // 2, self.viewport.height // 2)
+            self.focus(self.spawn(dialog.result, x, y))
 
         else:
             self.root.quit()
 
+    def add_pet(self):
+        """Function used to show the pet selection window and add one more pet to the canvas"""
+        dialog = SelectPet(self.root, self.sprites)
+        self.root.wait_window(dialog.dialog)
+
+        if dialog.result:
+            pet = self.spawn(dialog.result)
+            if not self.pet:
+                self.focus(pet)
+                self.start()
+            else:
+                self.show_focus()
+
+    def spawn(self, animal_type, x=None, y=None):
+        """Function used to add a pet to the simulation, at a random place when no coordinates are given
+            Returns: new Animal.
+        """
+        if x is None or y is None:
+            x, y = self.viewport.random_target(self.seeds)
+        pet = Animal(animal_type, self.canvas, x, y, self.clock, self.viewport, self.sprites, self.overlays,
+                     self.seeds.getrandbits(32))
+        self.add(pet)
+        return pet
+
+    def add(self, pet):
+        """Function used to put a created Animal into the simulation"""
+        pet.deferred = True
+        self.pets.append(pet)
+        self.pets_by_tag[pet.tag] = pet
+        if self.worker:
+            self.worker.spawn(pet)
+            self.scheduler.notify(pet, "add")
+        else:
+            self.scheduler.add(pet)
+
+    def load(self):
+        """Function used to bring back pets saved in the last session, time passed since then is caught up"""
+        def factory(animal_type, x, y, seed):
+            return Animal(animal_type, self.canvas, x, y, self.clock, self.viewport, self.sprites, self.overlays, seed)
+
+        try:
+            pets, now, elapsed = self.save.restore(factory, self.clock.step_ms)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Error loading save: {e}")
+            return
+
+        self.clock.ticks = self.scheduler.tick = int(now // self.clock.step_ms)
+        if self.worker:
+            self.worker.set_tick(self.clock.ticks)
+        for pet in pets:
+            if pet.eating:
+                pet.vis_bowl()
+            elif pet.playing:
+                pet.vis_toys()
+            self.add(pet)
+
+        if elapsed > 0:
+            self.skip(int(elapsed * 1000 // self.clock.step_ms) * self.clock.step_ms)
+        if self.pets:
+            self.focus(self.pets[0])
+
+    def save_all(self):
+        """Function used to write a snapshot of all pets, the journal starts over after it"""
+        if not self.worker:
+            for pet in self.pets:
+                self.scheduler.sync(pet)
+        self.save.compact(self.pets, self.now, CATALOGUE.species)
+
+    def on_pet_event(self, pet, kind, name=None):
+        """Function used to journal stat changes and actions of pets, see PetScheduler listeners"""
+        if self.save.record(pet, kind, self.now, name):
+            self.compact_due = True
+
+    def on_telemetry(self, pet, kind, name=None):
+        """Function used to record stat history of pets, see PetScheduler listeners"""
+        if kind == "remove":
+            self.histories.pop(pet, None)
+            return
+        if kind == "add":
+            self.histories[pet] = StatHistory()
+        self.histories[pet].record(self.now, pet)
+
+    def on_close(self):
+        """Function used to save pets, finish recording and close the main window"""
+        if self.recorder:
+            self.recorder.close()
+        if self.save:
+            self.save_all()
+            self.save.close()
+        if self.worker:
+            self.worker.close()
+        if self.observer:
+            self.observer.stop()
+        self.root.destroy()
+
+    @property
+    def now(self):
+        """Simulation time in milliseconds, of the worker process when there is one"""
+        return self.worker.now if self.worker else self.clock.now
+
+    def spawn_many(self, n):
+        """Function used to add n pets of the same type as the focused pet, e.g. to test crowded scenes"""
+        if self.pet:
+            for _ in range(n):
+                self.spawn(self.pet.type)
+            self.show_focus()
+
+    def focus(self, pet):
+        """Function used to choose the pet shown on status bars and fed or played with by the buttons"""
+        self.pet = pet
+        self.chart.show(self.histories.get(pet))
+        self.show_focus()
+
+    def show_focus(self):
+        """Function used to show the focused pet and number of pets above the canvas"""
+        text = f"Futrzak: {self.pet.type.capitalize()}"
+        if len(self.pets) > 1:
+            text += f" ({self.pets.index(self.pet) + 1}/{len(self.pets)})"
+        self.pet_info_label.config(text=text)
+
+    def show_worst(self):
+        """Function used to focus the pet worst off: the most hungry, bored or unhappy one"""
+        pet = self.census.worst_pet()
+        if pet is not None:
+            self.focus(pet)
+
+    def on_pet_click(self, event):
+        """Function used to focus the pet clicked on the canvas"""
+        for tag in self.canvas.gettags("current"):
+            if tag in self.pets_by_tag:
+                self.focus(self.pets_by_tag[tag])
+                return
+
+    def next_pet(self, event=None):
+        """Function used to focus the next pet, bound to Tab"""
+        if self.pets:
+            i = self.pets.index(self.pet) if self.pet in self.pets else -1
+            self.focus(self.pets[(i + 1) % len(self.pets)])
+        return "break"
+
     def show_food(self):
         """Function used to control what is displayed in food selection window"""
         if not self.pet:
             return
 
-        options = {
-            "Przekąska": "Szybka szamka",
-            "Obiad": "Na większy głód",
-            "Królewska uczta": "Na prawdziwe gastro"
-        }
-
-        dialog = SelectAct(self.root, "Co wpadnie na stół?", options)
+        dialog = SelectAct(self.root, "Co wpadnie na stół?", MEAL_OPTIONS)
         self.root.wait_window(dialog.dialog)
 
         if dialog.result:
-            self.pet.feed(dialog.result)
-            self.status_label.config(text=f"{self.pet.type} dostał {dialog.result}")
+            self.act(self.pet, "feed", dialog.result)
+            self.status_label.set(f"{self.pet.type} dostał {dialog.result}")
 
     def show_fun(self):
         """Function used to control what is displayed in play selection window"""
         if not self.pet:
             return
 
-        options = {
-            "Na odwal": "Dziś ci się nie chce...",
-            "Z życiem": "Nie ma to jak chwile z futrzakiem!",
-            "Do upadku": "Lepiej być nie może!"
-        }
-
-        dialog = SelectAct(self.root, "Jak się dziś pobawimy?", options)
+        dialog = SelectAct(self.root, "Jak się dziś pobawimy?", PLAY_OPTIONS)
         self.root.wait_window(dialog.dialog)
 
         if dialog.result:
-            self.pet.play(dialog.result)
-            self.status_label.config(text=f"Playing with your {self.pet.type} for a {dialog.result} session!")
+            self.act(self.pet, "play", dialog.result)
+            self.status_label.set(f"Playing with your {self.pet.type} for a {dialog.result} session!")
+
+    def act(self, pet, kind, name):
+        """Function used to feed or play with a pet, in the worker process when there is one
+            Args: pet - Animal, kind - "feed" or "play", name - meal or play type.
+        """
+        if self.worker:
+            self.worker.send(kind, self.pets.index(pet), name)
+            self.scheduler.notify(pet, kind, name)
+        elif kind == "feed":
+            self.scheduler.feed(pet, name)
+        else:
+            self.scheduler.play(pet, name)
+
+    def on_observed(self, pet, kind, name=None):
+        """Function used to collect pets to send to observers, see PetScheduler listeners"""
+        if kind == "remove":
+            self.observed.discard(pet)
+            self.observed_removed.append(pet.tag)
+        else:
+            self.observed.add(pet)
+
+    def observe(self):
+        """Function used to run commands of observers and send them pets changed since the last time,
+            at most at the rate of the observer server. Stats only change at events (on_observed),
+            positions only while pets move (PetScheduler.moving), so the cost follows changes, not the number of pets."""
+        while True:
+            try:
+                kind, tag, name = self.observer.commands.get_nowait()
+            except queue.Empty:
+                break
+            pet = self.pets_by_tag.get(tag)
+            if pet is not None:
+                self.act(pet, kind, name)
+
+        now = time.perf_counter()
+        if now - self.observed_at < 1 / self.observer.rate:
+            return
+        self.observed_at = now
+
+        if self.worker:
+            moving = {pet for pet in self.pets if pet.moving}
+        else:
+            moving = set(self.scheduler.moving)
+        pets = self.observed | moving | self.observed_moving
+        self.observer.publish(self.now, {pet.tag: pet_row(pet) for pet in pets}, self.observed_removed)
+        self.observed_moving = moving
+        self.observed = set()
+        self.observed_removed = []
+
+    def export_profile(self, event=None):
+        """Function used to write profiler measurements next to the save file, as JSON and as a CSV trace"""
+        if not self.profiler.frames:
+            self.status_label.set("Brak pomiarów, włącz profiler klawiszem F3")
+            return
+        base = os.path.join(os.path.dirname(SAVE_PATH), time.strftime("profile-%Y%m%d-%H%M%S"))
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        self.profiler.export(base + ".json")
+        self.profiler.export(base + ".csv")
+        self.status_label.set(f"Pomiary zapisane w {base}.json i .csv")
+
+    def toggle_pause(self, event=None):
+        """Function used to pause or resume the simulation time"""
+        if self.clock.paused:
+            self.clock.resume()
+        else:
+            self.clock.pause()
+        if self.worker:
+            self.worker.send("pause", self.clock.paused)
+        self.show_clock()
+
+    def fast_forward(self, speed):
+        """Function used to change how fast the simulation time runs
+            Args: speed - time acceleration, e.g. 10 for 10x.
+        """
+        self.clock.set_speed(speed)
+        if self.worker:
+            self.worker.send("speed", speed)
+        self.show_clock()
+
+    def show_clock(self):
+        """Function used to show the clock state in the window title"""
+        if self.clock.paused:
+            self.root.title("Pet Simulator (pauza)")
+        elif self.clock.speed != 1:
+            self.root.title(f"Pet Simulator (x{self.clock.speed})")
+        else:
+            self.root.title("Pet Simulator")
 
     def update_bars(self):
         """Function used to update all status bars"""
@@ -556,25 +1047,105 @@ class Simulator:
             self.happinessbar.update(self.pet.happiness)
 
             if self.pet.hunger > 80:
-                self.status_label.config(text=f"{self.pet.type} jest bardzo głodny", foreground="red")
+                self.status_label.set(f"{self.pet.type} jest bardzo głodny", foreground="red")
             elif self.pet.boredom > 80:
-                self.status_label.config(text=f"{self.pet.type} jest bardzo znudzony", foreground="blue")
+                self.status_label.set(f"{self.pet.type} jest bardzo znudzony", foreground="blue")
             elif self.pet.happiness > 80:
-                self.status_label.config(text=f"{self.pet.type} jest szczęsliwy", foreground="green")
+                self.status_label.set(f"{self.pet.type} jest szczęsliwy", foreground="green")
             else:
-                self.status_label.config(text=f"{self.pet.type} jest z nim git", foreground="black")
+                self.status_label.set(f"{self.pet.type} jest z nim git", foreground="black")
 
     def start(self):
         """Function starting the loop in which the game will be running"""
+        if self.frame_job is None:
+            self.frames.wake()
+            self.frame()
+
+    def frame(self):
+        """Function running one frame: simulation steps due since the last frame, interpolation, drawing pets
+            at the current level of detail and status bars.
+            The next frame is planned by the frame scheduler, fast while pets move and slow when nothing happens."""
+        self.frame_job = None
+        started = time.perf_counter()
+        profiler = self.profiler
+        profiler.begin()
+        if self.worker:
+            for pet in self.worker.apply(self.pets):
+                self.scheduler.notify(pet, "stats")
+            profiler.mark("sim")
+        else:
+            steps = self.clock.advance()
+            skipped = self.clock.take_skipped()
+            if skipped:
+                self.skip(skipped)
 
-        def game_loop():
-            if self.pet:
-                self.pet.update()
-                self.update_bars()
+            for _ in range(steps):
+                self.scheduler.advance()
 
-            self.root.after(50, game_loop)  # 20 FPS
+            profiler.mark("sim")
+            self.scheduler.interpolate(self.clock.ticks + self.clock.alpha)
+        profiler.mark("move")
+        self.renderer.render(self.pets, self.pet)
+        profiler.mark("draw")
 
-        game_loop()
+        if self.pet:
+            self.update_bars()
+            self.chart.refresh()
+        self.census_panel.refresh()
+        profiler.mark("bars")
+
+        if self.compact_due:
+            self.compact_due = False
+            self.save_all()
+        profiler.mark("save")
+
+        if self.observer:
+            self.observe()
+        profiler.mark("observe")
+        profiler.end()
+
+        self.renderer.end_frame((time.perf_counter() - started) * 1000, self.pets)
+        if profiler.enabled:
+            self.hud.refresh()
+
+        moving = self.worker.moving if self.worker else self.scheduler.moving
+        busy = bool(moving) and not self.clock.paused
+        delay = self.frames.delay(busy, self.until_next_event())
+        self.frame_job = self.root.after(delay, self.frame)
+
+    def skip(self, elapsed):
+        """Function used to catch up elapsed milliseconds of simulation time in closed form, see PetScheduler.skip"""
+        if self.worker:
+            self.worker.send("skip", elapsed)
+            return
+        if self.recorder:
+            self.recorder.skip(elapsed)
+        self.scheduler.skip(elapsed)
+
+    def until_next_event(self):
+        """Function computing real time in milliseconds until the next simulation event, None if there is none"""
+        due = self.scheduler.next_due()
+        if due is None or self.clock.paused:
+            return None
+        ticks = due - self.clock.ticks - self.clock.alpha
+        return max(0, ticks * self.clock.step_ms / self.clock.speed)
+
+    def wake(self, event=None):
+        """Function rendering the next frame right away, called on user input"""
+        if self.frame_job is not None:
+            self.root.after_cancel(self.frame_job)
+            self.frames.wake()
+            self.frame_job = self.root.after_idle(self.frame)
+
+    def on_map(self, event):
+        """Function used to slow the frame rate down while the main window is minimized.
+            The clock then accepts frames as long as the hidden frame interval, so minimized time is stepped
+            normally instead of going through the stall path (PetScheduler.skip) every frame."""
+        if event.widget is self.root:
+            mapped = event.type == tk.EventType.Map
+            self.frames.set_mapped(mapped)
+            self.clock.max_frame_ms = self.stall_ms if mapped else max(self.stall_ms, 2 * self.frames.hidden_ms)
+            self.wake()
 
     def run(self):
         """Function starting the application"""
@@ -0,0 +1,89 @@
+import os
+from collections import OrderedDict
+
+import tkinter as tk
+
+IMAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
+
+
+class SpriteStore:
+    """Class SpriteStore decodes pet images once and keeps scaled variants keyed by (species, size).
+
+        Paths are resolved relative to this module, not the working directory, and species names
+        are lowercased, so "Pies" and "pies" share one image. Each PNG is decoded at most once,
+        a missing or broken file is remembered as None. Scaled variants are kept in an LRU cache
+        of at most max_variants entries, images already shown on a canvas stay alive through
+        the references their owners hold.
+    """
+    def __init__(self, directory=IMAGES, max_variants=32):
+        self.directory = directory
+        self.max_variants = max_variants
+        self.sources = {}
+        self.variants = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, species):
+        """Function returning path of the PNG image of a species"""
+        return os.path.join(self.directory, f"{species.lower()}.png")
+
+    def source(self, species):
+        """Function returning the full size image of a species, decoded on first use, None if it can't be loaded"""
+        species = species.lower()
+        if species not in self.sources:
+            try:
+                path = self.path(species)
+                if not os.path.exists(path):
+                    raise FileNotFoundError("nie znaleziono img")
+                self.sources[species] = tk.PhotoImage(file=path)
+            except Exception as e:
+                print(f"Error loading PNG for {species}: {e}")
+                self.sources[species] = None
+        return self.sources[species]
+
+    def get(self, species, size):
+        """Function returning image of a species scaled down to fit in size x size pixels
+
+            Args: species - type of the pet, size - largest allowed width and height.
+            Returns: PhotoImage or None when the image can't be loaded.
+        """
+        key = (species.lower(), size)
+        if key in self.variants:
+            self.hits += 1
+            self.variants.move_to_end(key)
+            return self.variants[key]
+
+        self.misses += 1
+        image = self.source(species)
+        if image is not None and (image.width() > size or image.height() > size):
+            factor = max(image.width() // size, image.height() // size, 1)
+            image = image.subsample(factor, factor)
+
+        self.variants[key] = image
+        while len(self.variants) > self.max_variants:
+            self.variants.popitem(last=False)
+        return image
+
+    def warm(self, widget, keys):
+        """Function loading given (species, size) variants in the background, one per idle moment of Tk,
+            so the first pet or picker doesn't wait for decoding.
+
+            Args: widget - any Tk widget used to schedule work, keys - iterable of (species, size).
+        """
+        pending = list(keys)
+
+        def load_next():
+            if pending:
+                self.get(*pending.pop(0))
+                widget.after_idle(load_next)
+
+        widget.after_idle(load_next)
+
+    def clear(self):
+        """Function dropping all decoded images and variants"""
+        self.sources.clear()
+        self.variants.clear()
+
+
+# wspólny magazyn dla Animal i SelectPet
+SPRITES = SpriteStore()
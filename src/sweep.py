@@ -0,0 +1,148 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+
+from core import Pet, MEALS, PLAYS
+
+METRICS = ("happiness", "starving", "bored", "actions_per_hour")
+
+
+def scaled(table, stat, scale):
+    """Function returning a copy of a meal or play table with the stat reduction multiplied by scale"""
+    return {name: replace(info, **{stat: getattr(info, stat) * scale}) for name, info in table.items()}
+
+
+def simulate(point):
+    """Function simulating a batch of pets under one balance setting and care policy, stats only, in closed form
+
+        Args: point - dict with hunger_interval, boredom_interval, meal_scale, play_scale, feed_at, play_at,
+        meal, play, pets, hours, check_ms, step_ms and seed.
+        Returns: dict of per-pet metric lists: mean happiness, fraction of time with hunger or boredom over 80,
+        actions per hour.
+    """
+    rng = random.Random(point["seed"])
+    meals = scaled(MEALS, "hunger", point["meal_scale"])
+    plays = scaled(PLAYS, "boredom", point["play_scale"])
+    step_ms = point["step_ms"]
+    steps = point["check_ms"] // step_ms
+    checks = int(point["hours"] * 3600000 // point["check_ms"])
+    results = {name: [] for name in METRICS}
+
+    for _ in range(point["pets"]):
+        pet = Pet("sim", 0, 0)
+        pet.hunger_interval = point["hunger_interval"]
+        pet.boredom_interval = point["boredom_interval"]
+        pet.meals = meals
+        pet.plays = plays
+        pet.hunger = rng.randint(0, 100)
+        pet.boredom = rng.randint(0, 100)
+
+        happiness = starving = bored = actions = 0
+        for _ in range(checks):
+            pet.skip(steps, step_ms)
+            happiness += pet.happiness
+            starving += pet.hunger > 80
+            bored += pet.boredom > 80
+
+            if not pet.eating and not pet.playing:
+                if pet.hunger >= point["feed_at"]:
+                    pet.feed(point["meal"])
+                    actions += 1
+                elif pet.boredom >= point["play_at"]:
+                    pet.play(point["play"])
+                    actions += 1
+
+        results["happiness"].append(happiness / checks)
+        results["starving"].append(starving / checks)
+        results["bored"].append(bored / checks)
+        results["actions_per_hour"].append(actions / point["hours"])
+    return results
+
+
+def summary(values):
+    """Function describing a distribution by mean, 10th, 50th and 90th percentile"""
+    if len(values) > 1:
+        p10, p50, p90 = (statistics.quantiles(values, n=10, method="inclusive")[i] for i in (0, 4, 8))
+    else:
+        p10 = p50 = p90 = values[0]
+    return {"mean": statistics.fmean(values), "p10": p10, "p50": p50, "p90": p90}
+
+
+def grid(args):
+    """Function listing all combinations of swept parameters as simulation points"""
+    meals = list(MEALS)
+    plays = list(PLAYS)
+    keys = ("hunger_interval", "boredom_interval", "meal_scale", "play_scale", "feed_at", "play_at", "meal", "play")
+    values = (args.hunger_interval, args.boredom_interval, args.meal_scale, args.play_scale,
+              args.feed_at, args.play_at, [meals[i] for i in args.meal], [plays[i] for i in args.play])
+
+    # to samo ziarno w każdym punkcie, różnice wyników biorą się tylko z parametrów
+    for combination in itertools.product(*values):
+        point = dict(zip(keys, combination))
+        point.update(pets=args.pets, hours=args.hours, check_ms=args.check_ms, step_ms=args.step_ms,
+                     seed=args.seed)
+        yield point
+
+
+def run(points, workers=None):
+    """Function simulating points on a pool of processes, one per core by default
+
+        Returns: list of (point, {metric: summary}).
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(simulate, points)
+        return [(point, {name: summary(values) for name, values in result.items()})
+                for point, result in zip(points, results)]
+
+
+def main(argv=None):
+    """Main function of the balance sweep command line tool"""
+    parser = argparse.ArgumentParser(description="Monte Carlo balance sweep of headless pets under scripted care")
+    parser.add_argument("--hunger-interval", type=int, nargs="+", default=[3000], help="ms between hunger increments")
+    parser.add_argument("--boredom-interval", type=int, nargs="+", default=[5000], help="ms between boredom increments")
+    parser.add_argument("--meal-scale", type=float, nargs="+", default=[1.0], help="multiplier of hunger taken by meals")
+    parser.add_argument("--play-scale", type=float, nargs="+", default=[1.0], help="multiplier of boredom taken by play")
+    parser.add_argument("--feed-at", type=int, nargs="+", default=[70], help="policy: feed when hunger reaches this")
+    parser.add_argument("--play-at", type=int, nargs="+", default=[70], help="policy: play when boredom reaches this")
+    parser.add_argument("--meal", type=int, nargs="+", default=[1], help=f"policy: meal index in {list(MEALS)}")
+    parser.add_argument("--play", type=int, nargs="+", default=[1], help=f"policy: play index in {list(PLAYS)}")
+    parser.add_argument("--pets", type=int, default=200, help="pets per point")
+    parser.add_argument("--hours", type=float, default=24, help="simulated hours per pet")
+    parser.add_argument("--check-ms", type=int, default=10000, help="how often the policy looks at a pet")
+    parser.add_argument("--step-ms", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="processes, all cores by default")
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = parser.parse_args(argv)
+    for option, indices, names in (("--meal", args.meal, MEALS), ("--play", args.play, PLAYS)):
+        if any(not 0 <= i < len(names) for i in indices):
+            parser.error(f"{option} takes indices from 0 to {len(names) - 1}")
+
+    points = list(grid(args))
+    start = time.perf_counter()
+    results = run(points, args.workers)
+    took = time.perf_counter() - start
+
+    for point, metrics in results:
+        if args.json:
+            print(json.dumps({"point": point, "metrics": metrics}, ensure_ascii=False))
+        else:
+            swept = " ".join(f"{key}={point[key]}" for key in ("hunger_interval", "boredom_interval", "meal_scale",
+                                                                "play_scale", "feed_at", "play_at", "meal", "play"))
+            print(swept)
+            for name, stats in metrics.items():
+                print(f"    {name:<17} mean {stats['mean']:8.3f}  p10 {stats['p10']:8.3f}  "
+                      f"p50 {stats['p50']:8.3f}  p90 {stats['p90']:8.3f}")
+    print(f"{len(points)} points x {args.pets} pets in {took:.1f} s on {args.workers or os.cpu_count()} processes",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
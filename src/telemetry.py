@@ -0,0 +1,88 @@
+from array import array
+
+FIELDS = ("hunger", "boredom", "happiness")
+
+
+class Ring:
+    """Class Ring is a fixed-size ring buffer of timestamped stat samples kept in flat arrays.
+
+        Samples are numbered from 0 in order of appending (total is the next number),
+        only the last capacity of them are kept.
+    """
+    def __init__(self, capacity, fields=len(FIELDS)):
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.values = [array("f", bytes(4 * capacity)) for _ in range(fields)]
+        self.total = 0
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, t, values):
+        """Function adding a sample, overwriting the oldest one when the buffer is full"""
+        i = self.total % self.capacity
+        self.times[i] = t
+        for column, value in zip(self.values, values):
+            column[i] = value
+        self.total += 1
+
+    @property
+    def first(self):
+        """Number of the oldest sample still kept"""
+        return self.total - len(self)
+
+    def since(self, seq):
+        """Function iterating over kept samples numbered seq and later
+
+            Returns: iterator of (number, time, tuple of values).
+        """
+        for n in range(max(seq, self.first), self.total):
+            i = n % self.capacity
+            yield n, self.times[i], tuple(column[i] for column in self.values)
+
+
+class Tier:
+    """Class Tier downsamples stats into buckets of period milliseconds, a bucket is stored
+        as the mean of its samples when the first sample of a later bucket arrives.
+        Period 0 keeps every sample.
+    """
+    def __init__(self, period, capacity):
+        self.period = period
+        self.ring = Ring(capacity)
+        self.bucket = None
+        self.sums = [0.0] * len(FIELDS)
+        self.n = 0
+
+    def add(self, t, values):
+        """Function adding a sample taken at simulation time t (ms)"""
+        if not self.period:
+            self.ring.append(t, values)
+            return
+
+        bucket = int(t // self.period)
+        if bucket != self.bucket and self.n:
+            self.ring.append(self.bucket * self.period, [s / self.n for s in self.sums])
+            self.sums = [0.0] * len(FIELDS)
+            self.n = 0
+        self.bucket = bucket
+        for i, value in enumerate(values):
+            self.sums[i] += value
+        self.n += 1
+
+
+class StatHistory:
+    """Class StatHistory records stats of one pet at several resolutions in bounded memory
+
+        Args: tiers - pairs of (period in ms, number of samples kept), period 0 keeps every change.
+    """
+    TIERS = ((0, 200), (1000, 200), (60000, 200), (3600000, 200))
+    NAMES = ("zmiany", "1 s", "1 min", "1 h")
+
+    def __init__(self, tiers=TIERS):
+        self.tiers = [Tier(period, capacity) for period, capacity in tiers]
+
+    def record(self, t, pet):
+        """Function recording current stats of a pet at simulation time t (ms)"""
+        values = (pet.hunger, pet.boredom, pet.happiness)
+        for tier in self.tiers:
+            tier.add(t, values)
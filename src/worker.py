@@ -0,0 +1,218 @@
+import multiprocessing
+import queue
+import time
+from array import array
+from multiprocessing import shared_memory
+
+from core import Pet, SimClock, Viewport, MEALS, PLAYS
+from scheduler import PetScheduler
+
+# x, y, hunger, boredom, happiness, flagi, posiłek, zabawa, hungerT, boredomT, actionT
+FIELDS = 11
+# wersja, liczba zwierzaków, czas symulacji (ms)
+HEADER = 3
+EATING = 1
+PLAYING = 2
+MEAL_NAMES = list(MEALS)
+PLAY_NAMES = list(PLAYS)
+
+
+def buffer_size(capacity):
+    """Function computing size in doubles of one snapshot buffer"""
+    return HEADER + capacity * FIELDS
+
+
+def publish(view, capacity, pets, now):
+    """Function writing a snapshot of pets into the back buffer and making it the front one.
+
+        Each buffer has a version, odd while it is being written (a seqlock), so a reader can tell
+        a torn copy and retry.
+    """
+    back = 1 - int(view[0])
+    base = 1 + back * buffer_size(capacity)
+    view[base] += 1
+
+    data = array("d")
+    for pet in pets[:capacity]:
+        flags = (EATING if pet.eating else 0) | (PLAYING if pet.playing else 0)
+        meal = MEALS[pet.foodUsed].index if pet.foodUsed in MEALS else -1
+        play = PLAYS[pet.playtime].index if pet.playtime in PLAYS else -1
+        data.extend((pet.x, pet.y, pet.hunger, pet.boredom, pet.happiness, flags, meal, play,
+                     pet.hungerT, pet.boredomT, pet.actionT))
+    view[base + 1] = len(data) // FIELDS
+    view[base + 2] = now
+    if data:
+        view[base + HEADER:base + HEADER + len(data)] = memoryview(data)
+
+    view[base] += 1
+    view[0] = back
+
+
+def read(view, capacity, tries=5):
+    """Function copying the front snapshot
+
+        Returns: (simulation time in ms, array of FIELDS doubles per pet), or None if it kept changing.
+    """
+    for _ in range(tries):
+        front = int(view[0])
+        base = 1 + front * buffer_size(capacity)
+        version = view[base]
+        if int(version) % 2:
+            continue
+        count = int(view[base + 1])
+        now = view[base + 2]
+        data = array("d")
+        data.frombytes(view[base + HEADER:base + HEADER + count * FIELDS].tobytes())
+        if view[base] == version and int(view[0]) == front:
+            return now, data
+    return None
+
+
+def run(name, capacity, commands, step_ms, width, height, rate):
+    """Worker process: runs PetScheduler on its own clock, applies commands and publishes snapshots rate times a second"""
+    memory = shared_memory.SharedMemory(name=name)
+    view = memory.buf.cast("d")
+    clock = SimClock(step_ms)
+    viewport = Viewport(width, height)
+    scheduler = PetScheduler(step_ms, viewport)
+    pets = []
+    period = 1 / rate
+
+    try:
+        while True:
+            started = time.monotonic()
+            while True:
+                try:
+                    command = commands.get_nowait()
+                except queue.Empty:
+                    break
+                kind = command[0]
+                if kind == "stop":
+                    return
+                elif kind == "tick":
+                    clock.ticks = scheduler.tick = command[1]
+                elif kind == "spawn":
+                    _, animal_type, seed, state = command
+                    pet = Pet(animal_type, state["x"], state["y"], seed)
+                    for attribute, value in state.items():
+                        setattr(pet, attribute, value)
+                    pets.append(pet)
+                    scheduler.add(pet)
+                elif kind == "feed":
+                    scheduler.feed(pets[command[1]], command[2])
+                elif kind == "play":
+                    scheduler.play(pets[command[1]], command[2])
+                elif kind == "resize":
+                    viewport.resize(command[1], command[2])
+                elif kind == "skip":
+                    scheduler.skip(command[1])
+                elif kind == "speed":
+                    clock.set_speed(command[1])
+                elif kind == "pause":
+                    clock.pause() if command[1] else clock.resume()
+
+            steps = clock.advance()
+            skipped = clock.take_skipped()
+            if skipped:
+                scheduler.skip(skipped)
+            for _ in range(steps):
+                scheduler.advance()
+            # staty zmieniają się tylko przy zdarzeniach, więc są aktualne bez sync
+            scheduler.interpolate(clock.ticks + clock.alpha)
+            publish(view, capacity, pets, clock.now)
+
+            time.sleep(max(0, period - (time.monotonic() - started)))
+    finally:
+        view.release()
+        memory.close()
+
+
+class SimWorker:
+    """Class SimWorker runs the simulation of pets in a separate process.
+
+        Commands (tick, spawn, feed, play, resize, skip, speed, pause) go to the worker over a queue,
+        positions and stats come back as double-buffered snapshots in shared memory, so the Tk side
+        only reads the latest snapshot however heavy the simulation is. At most capacity pets are simulated.
+    """
+    def __init__(self, capacity=4096, step_ms=50, width=800, height=400, rate=60):
+        self.capacity = capacity
+        size = (1 + 2 * buffer_size(capacity)) * 8
+        self.memory = shared_memory.SharedMemory(create=True, size=size)
+        self.view = self.memory.buf.cast("d")
+        self.view[0] = 0
+
+        context = multiprocessing.get_context("spawn")
+        self.commands = context.Queue()
+        self.process = context.Process(
+            target=run, args=(self.memory.name, capacity, self.commands, step_ms, width, height, rate), daemon=True)
+        self.process.start()
+        self.step_ms = step_ms
+        self.now = 0
+        self.moving = 0
+
+    def send(self, *command):
+        """Function sending a command to the worker, e.g. send("feed", index, meal)"""
+        self.commands.put(command)
+
+    def set_tick(self, tick):
+        """Function setting the simulation time of the worker, e.g. to the time of a loaded save, before pets are spawned"""
+        self.send("tick", tick)
+        self.now = tick * self.step_ms
+
+    def spawn(self, pet):
+        """Function adding a pet to the simulation in the worker, with its seed and current state"""
+        state = {name: getattr(pet, name) for name in (
+            "x", "y", "target_x", "target_y", "hunger", "boredom", "happiness", "hungerT", "boredomT",
+            "move_timer", "actionT", "eating", "playing", "foodUsed", "playtime")}
+        self.send("spawn", pet.type, pet.seed, state)
+
+    def apply(self, pets):
+        """Function copying the latest snapshot into local pets (renderers), in spawn order
+
+            Returns: list of pets whose stats changed. Pets whose action started or ended get
+            action_started or after_eating called, moving counts pets that moved.
+        """
+        snapshot = read(self.view, self.capacity)
+        if snapshot is None:
+            return []
+        self.now, data = snapshot
+
+        changed = []
+        self.moving = 0
+        for i in range(min(len(pets), len(data) // FIELDS)):
+            pet = pets[i]
+            x, y, hunger, boredom, happiness, flags, meal, play, hungerT, boredomT, actionT = data[i * FIELDS:(i + 1) * FIELDS]
+            if (hunger, boredom, happiness) != (pet.hunger, pet.boredom, pet.happiness):
+                pet.hunger, pet.boredom, pet.happiness = hunger, boredom, happiness
+                changed.append(pet)
+
+            eating, playing = pet.eating, pet.playing
+            food, playtime = pet.foodUsed, pet.playtime
+            pet.eating = bool(int(flags) & EATING)
+            pet.playing = bool(int(flags) & PLAYING)
+            pet.foodUsed = MEAL_NAMES[int(meal)] if meal >= 0 else None
+            pet.playtime = PLAY_NAMES[int(play)] if play >= 0 else None
+            pet.hungerT, pet.boredomT, pet.actionT = hungerT, boredomT, actionT
+
+            pet.moving = x != pet.x or y != pet.y
+            if pet.moving:
+                pet.move(x, y)
+                self.moving += 1
+
+            if (eating or playing) and not pet.eating and not pet.playing:
+                pet.after_eating()
+            if pet.eating and (not eating or pet.foodUsed != food):
+                pet.action_started("feed")
+            if pet.playing and (not playing or pet.playtime != playtime):
+                pet.action_started("play")
+        return changed
+
+    def close(self):
+        """Function stopping the worker process and freeing shared memory"""
+        self.send("stop")
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.view.release()
+        self.memory.close()
+        self.memory.unlink()